@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass(frozen=True)
+class TriggeredAlertDTO:
+    alert_id: int
+    email: str
+    product_name: str
+    currency_code: str
+    target_price_cents: int
+    min_price_cents: int
+
+
+@dataclass(frozen=True)
+class PriceAlertNotificationDTO:
+    email: str
+    product_name: str
+    target_price: Decimal
+    current_min_price: Decimal | None
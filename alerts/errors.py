@@ -0,0 +1,8 @@
+class AlertError(Exception):
+    pass
+
+
+class NotificationDeliveryError(AlertError):
+    def __init__(self, sent: int):
+        super().__init__(f"Notification delivery failed after {sent} sent")
+        self.sent = sent
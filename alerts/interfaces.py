@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 
+from alerts.dtos import PriceAlertNotificationDTO
 from alerts.models import PriceAlert
 
 User = get_user_model()
@@ -10,13 +10,7 @@ User = get_user_model()
 
 class INotificationService(ABC):
     @abstractmethod
-    def send_price_alert(
-        self,
-        product_name: str,
-        email: str,
-        target_price: Decimal,
-        current_min_price: Decimal,
-    ) -> None:
+    def send_price_alerts(self, notifications: list[PriceAlertNotificationDTO]) -> int:
         pass
 
 
@@ -34,3 +28,11 @@ class IPriceAlertService(ABC):
     @abstractmethod
     def check_and_send(self) -> int:
         pass
+
+    @abstractmethod
+    def check_products(self, product_ids: list[int]) -> int:
+        pass
+
+    @abstractmethod
+    def refresh_target_prices(self) -> list[int]:
+        pass
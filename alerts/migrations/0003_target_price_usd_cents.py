@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricealert',
+            name='target_price_usd_cents',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:31
+
+from django.db import migrations
+
+FILL_TARGET_PRICE_USD_CENTS = """
+    WITH latest_rates AS (
+        SELECT DISTINCT ON (exchange_rates.currency_id)
+            currencies.code,
+            exchange_rates.rate_to_usd
+        FROM exchange_rates
+        JOIN currencies ON currencies.id = exchange_rates.currency_id
+        WHERE currencies.code <> 'USD'
+        ORDER BY exchange_rates.currency_id, exchange_rates.date DESC
+    ),
+    rates AS (
+        SELECT code, rate_to_usd FROM latest_rates
+        UNION ALL
+        SELECT 'USD', 1
+    )
+    UPDATE price_alerts
+    SET target_price_usd_cents = ROUND(
+        price_alerts.target_price_cents * rates.rate_to_usd
+    )
+    FROM rates
+    WHERE rates.code = UPPER(price_alerts.currency_code)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0003_target_price_usd_cents'),
+        ('currencies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "UPDATE price_alerts SET currency_code = UPPER(currency_code)",
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(FILL_TARGET_PRICE_USD_CENTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0004_fill_target_price_usd_cents'),
+        ('products', '0004_storefeedstate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pricealert',
+            name='target_price_usd_cents',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['product', 'target_price_usd_cents'], name='price_alerts_active_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['currency_code'], name='price_alerts_active_ccy_idx'),
+        ),
+    ]
@@ -17,6 +17,7 @@ class PriceAlert(BaseTimestampedModel):
         related_name="price_alerts",
     )
     target_price_cents = models.IntegerField()
+    target_price_usd_cents = models.IntegerField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     triggered_at = models.DateTimeField(null=True, blank=True)
     currency_code = models.CharField(max_length=10)
@@ -28,6 +29,21 @@ class PriceAlert(BaseTimestampedModel):
                 fields=["user", "product"], name="unique_user_product"
             ),
         ]
+        # Most rows are triggered history, so only active alerts are indexed:
+        # triggering looks up products' alerts at or above their minimum
+        # price, and target refreshes look them up by currency.
+        indexes = [
+            models.Index(
+                fields=["product", "target_price_usd_cents"],
+                condition=models.Q(is_active=True),
+                name="price_alerts_active_target_idx",
+            ),
+            models.Index(
+                fields=["currency_code"],
+                condition=models.Q(is_active=True),
+                name="price_alerts_active_ccy_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.product.name} - {self.target_price_cents}"
@@ -1,50 +1,163 @@
+from collections import defaultdict
+from dataclasses import asdict
 from decimal import Decimal
+from itertools import batched
 
+from celery import signature
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
 from django.utils import timezone
 
+from alerts.dtos import PriceAlertNotificationDTO, TriggeredAlertDTO
+from alerts.errors import NotificationDeliveryError
 from alerts.interfaces import INotificationService, IPriceAlertService
 from alerts.models import PriceAlert
 from currencies.interfaces import ICurrencyConversionService
 from currencies.services import CurrencyConversionService
-from prices.interfaces import IPriceQueryService
-from prices.services import PriceQueryService
+from prices.utils import get_today_start
 
 
 User = get_user_model()
 
 
 class EmailNotificationService(INotificationService):
-    def send_price_alert(
-        self,
-        product_name: str,
-        email: str,
-        target_price: Decimal,
-        current_min_price: Decimal,
-    ) -> None:
-        send_mail(
-            subject=f"Price alert: {product_name}",
-            message=(
+    def send_price_alerts(self, notifications: list[PriceAlertNotificationDTO]) -> int:
+        sent = 0
+
+        # One SMTP session for the whole batch instead of one per alert.
+        # Failing to open or close it is a delivery error too, so the batch is
+        # retried from the first message that was not sent.
+        try:
+            with get_connection(fail_silently=False) as mail_connection:
+                for notification in notifications:
+                    mail_connection.send_messages([self._build_message(notification)])
+                    sent += 1
+        except Exception as error:
+            raise NotificationDeliveryError(sent) from error
+
+        return sent
+
+    @staticmethod
+    def _build_message(notification: PriceAlertNotificationDTO) -> EmailMessage:
+        # The price is missing when no exchange rate was found to convert it.
+        if notification.current_min_price is None:
+            price_line = "has dropped to your target price or below"
+        else:
+            price_line = f"has dropped to {notification.current_min_price}"
+
+        return EmailMessage(
+            subject=f"Price alert: {notification.product_name}",
+            body=(
                 f"Hello!\n\n"
-                f"The price for '{product_name}' has dropped to {current_min_price}.\n"
-                f"Your target price was {target_price}.\n\n"
+                f"The price for '{notification.product_name}' {price_line}.\n"
+                f"Your target price was {notification.target_price}.\n\n"
                 f"Check it out now!"
             ),
-            recipient_list=[email],
-            fail_silently=True,
+            to=[notification.email],
         )
 
 
+class QueuedNotificationService(INotificationService):
+    """
+    Hands notifications over to ``alerts.tasks.send_price_alert_emails`` in
+    batches, so alert evaluation does not wait for mail delivery.
+    """
+
+    def send_price_alerts(self, notifications: list[PriceAlertNotificationDTO]) -> int:
+        for batch in batched(notifications, settings.ALERT_NOTIFICATION_BATCH_SIZE):
+            signature(
+                "alerts.tasks.send_price_alert_emails",
+                args=[[self._to_payload(notification) for notification in batch]],
+            ).apply_async()
+
+        return len(notifications)
+
+    @staticmethod
+    def _to_payload(notification: PriceAlertNotificationDTO) -> dict:
+        return {
+            key: None if value is None else str(value)
+            for key, value in asdict(notification).items()
+        }
+
+
 class PriceAlertService(IPriceAlertService):
+    # Deactivates every active alert whose product is at or below the target
+    # today and returns what is needed to notify about it, in one statement.
+    # ``product_ids`` limits the check to products whose price just dropped.
+    TRIGGER_SQL = """
+        WITH today_min_prices AS (
+            SELECT
+                product_stores.product_id,
+                MIN(current_prices.price_cents) AS min_price_cents
+            FROM current_prices
+            JOIN product_stores
+                ON product_stores.id = current_prices.product_store_id
+            WHERE current_prices.observed_at >= %(today_start)s
+                AND product_stores.product_id IN (
+                    SELECT product_id FROM price_alerts WHERE is_active
+                )
+                AND (
+                    %(product_ids)s IS NULL
+                    OR product_stores.product_id = ANY(%(product_ids)s)
+                )
+            GROUP BY product_stores.product_id
+        )
+        UPDATE price_alerts
+        SET is_active = false, triggered_at = %(now)s, updated_at = %(now)s
+        FROM today_min_prices, products, users
+        WHERE price_alerts.is_active
+            AND today_min_prices.product_id = price_alerts.product_id
+            AND today_min_prices.min_price_cents <= price_alerts.target_price_usd_cents
+            AND products.id = price_alerts.product_id
+            AND users.id = price_alerts.user_id
+        RETURNING
+            price_alerts.id,
+            users.email,
+            products.name,
+            price_alerts.currency_code,
+            price_alerts.target_price_cents,
+            today_min_prices.min_price_cents
+    """
+
+    # Recomputes USD targets of active alerts from the latest rate of their
+    # currency, so triggering stays an integer comparison. Returns the products
+    # whose alerts changed, as a higher target can make an alert due.
+    REFRESH_TARGETS_SQL = """
+        WITH latest_rates AS (
+            SELECT DISTINCT ON (exchange_rates.currency_id)
+                currencies.code,
+                exchange_rates.rate_to_usd
+            FROM exchange_rates
+            JOIN currencies ON currencies.id = exchange_rates.currency_id
+            WHERE exchange_rates.date <= %(today)s AND currencies.code <> 'USD'
+            ORDER BY exchange_rates.currency_id, exchange_rates.date DESC
+        ),
+        rates AS (
+            SELECT code, rate_to_usd FROM latest_rates
+            UNION ALL
+            SELECT 'USD', 1
+        )
+        UPDATE price_alerts
+        SET target_price_usd_cents = ROUND(
+            price_alerts.target_price_cents * rates.rate_to_usd
+        )
+        FROM rates
+        WHERE price_alerts.is_active
+            AND rates.code = price_alerts.currency_code
+            AND price_alerts.target_price_usd_cents IS DISTINCT FROM ROUND(
+                price_alerts.target_price_cents * rates.rate_to_usd
+            )
+        RETURNING price_alerts.product_id
+    """
+
     def __init__(
         self,
-        price_query: IPriceQueryService | None = None,
         notification: INotificationService | None = None,
         conversion: ICurrencyConversionService | None = None,
     ):
-        self._price_query = price_query or PriceQueryService()
-        self._notification = notification or EmailNotificationService()
+        self._notification = notification or QueuedNotificationService()
         self._conversion = conversion or CurrencyConversionService()
 
     def create(
@@ -54,11 +167,15 @@ class PriceAlertService(IPriceAlertService):
         target_price_cents: int,
         currency_code: str
     ) -> PriceAlert:
+        currency_code = currency_code.upper()
         alert, _ = PriceAlert.objects.update_or_create(
             user=user,
             product_id=product_id,
             defaults={
                 "target_price_cents": target_price_cents,
+                "target_price_usd_cents": self._conversion.to_usd_cents(
+                    target_price_cents, currency_code
+                ),
                 "currency_code": currency_code,
                 "is_active": True,
                 "triggered_at": None,
@@ -67,34 +184,57 @@ class PriceAlertService(IPriceAlertService):
         return alert
 
     def check_and_send(self) -> int:
-        active_alerts = PriceAlert.objects.filter(is_active=True).select_related(
-            "user", "product"
-        )
-        sent = 0
+        return self._check(product_ids=None)
 
-        for alert in active_alerts:
-            price_range = self._price_query.get_price_range_today(alert.product_id)
-            min_price_cents = price_range.min_price_cents
+    def check_products(self, product_ids: list[int]) -> int:
+        if not product_ids:
+            return 0
 
-            if min_price_cents is None:
-                continue
+        return self._check(product_ids)
 
-            if min_price_cents <= alert.target_price_cents:
-                min_price_converted = self._conversion.convert(
-                    min_price_cents, alert.currency_code
-                )
-                target_price_converted = self._conversion.convert(
-                    alert.target_price_cents, alert.currency_code
-                )
-                self._notification.send_price_alert(
-                    product_name=alert.product.name,
-                    email=alert.user.email,
-                    target_price=target_price_converted,
-                    current_min_price=min_price_converted,
+    def _check(self, product_ids: list[int] | None) -> int:
+        triggered_alerts = self._trigger_alerts(product_ids)
+
+        alerts_by_currency = defaultdict(list)
+        for alert in triggered_alerts:
+            alerts_by_currency[alert.currency_code].append(alert)
+
+        notifications = []
+        for currency_code, alerts in alerts_by_currency.items():
+            min_prices = self._conversion.convert_many(
+                [alert.min_price_cents for alert in alerts], currency_code
+            )
+
+            for alert, min_price in zip(alerts, min_prices):
+                notifications.append(
+                    PriceAlertNotificationDTO(
+                        email=alert.email,
+                        product_name=alert.product_name,
+                        target_price=Decimal(alert.target_price_cents).scaleb(-2),
+                        current_min_price=min_price,
+                    )
                 )
-                alert.is_active = False
-                alert.triggered_at = timezone.now()
-                alert.save(update_fields=["is_active", "triggered_at"])
-                sent += 1
 
-        return sent
+        if notifications:
+            self._notification.send_price_alerts(notifications)
+
+        return len(triggered_alerts)
+
+    def refresh_target_prices(self) -> list[int]:
+        with connection.cursor() as cursor:
+            cursor.execute(self.REFRESH_TARGETS_SQL, {"today": timezone.now().date()})
+
+            return sorted({product_id for (product_id,) in cursor.fetchall()})
+
+    def _trigger_alerts(self, product_ids: list[int] | None) -> list[TriggeredAlertDTO]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.TRIGGER_SQL,
+                {
+                    "today_start": get_today_start(),
+                    "now": timezone.now(),
+                    "product_ids": product_ids,
+                },
+            )
+
+            return [TriggeredAlertDTO(*row) for row in cursor.fetchall()]
@@ -1,4 +1,7 @@
-from celery import shared_task
+from decimal import Decimal
+
+from celery import shared_task, signature
+from django.conf import settings
 
 
 @shared_task
@@ -6,3 +9,61 @@ def check_price_alerts():
     from alerts.services import PriceAlertService
 
     return PriceAlertService().check_and_send()
+
+
+@shared_task
+def check_price_alerts_for_products(product_ids):
+    from alerts.services import PriceAlertService
+
+    return PriceAlertService().check_products(product_ids)
+
+
+@shared_task
+def refresh_alert_target_prices():
+    from alerts.services import PriceAlertService
+
+    product_ids = PriceAlertService().refresh_target_prices()
+
+    # A rate change can raise targets above today's prices, so those alerts
+    # are checked now instead of waiting for the daily sweep.
+    if product_ids:
+        signature(
+            "alerts.tasks.check_price_alerts_for_products", args=[product_ids]
+        ).apply_async()
+
+    return len(product_ids)
+
+
+@shared_task(
+    bind=True,
+    rate_limit=settings.ALERT_NOTIFICATION_RATE_LIMIT,
+    max_retries=settings.ALERT_NOTIFICATION_MAX_RETRIES,
+    default_retry_delay=settings.ALERT_NOTIFICATION_RETRY_DELAY,
+)
+def send_price_alert_emails(self, notifications):
+    from alerts.dtos import PriceAlertNotificationDTO
+    from alerts.errors import NotificationDeliveryError
+    from alerts.services import EmailNotificationService
+
+    try:
+        return EmailNotificationService().send_price_alerts(
+            [
+                PriceAlertNotificationDTO(
+                    email=notification["email"],
+                    product_name=notification["product_name"],
+                    target_price=Decimal(notification["target_price"]),
+                    current_min_price=(
+                        None
+                        if notification["current_min_price"] is None
+                        else Decimal(notification["current_min_price"])
+                    ),
+                )
+                for notification in notifications
+            ]
+        )
+    except NotificationDeliveryError as error:
+        if error.sent == len(notifications):
+            return error.sent
+
+        # Messages already delivered are not sent again on retry.
+        raise self.retry(args=[notifications[error.sent :]], exc=error)
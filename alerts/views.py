@@ -5,6 +5,7 @@ from alerts.interfaces import IPriceAlertService
 from alerts.models import PriceAlert
 from alerts.serializers import PriceAlertCreateSerializer, PriceAlertResponseSerializer
 from alerts.services import PriceAlertService
+from alerts.tasks import check_price_alerts_for_products
 
 
 class PriceAlertViewSet(
@@ -35,9 +36,15 @@ class PriceAlertViewSet(
         )
 
     def perform_create(self, serializer: PriceAlertCreateSerializer) -> PriceAlert:
-        return self._service.create(
+        alert = self._service.create(
             user=self.request.user,
             product_id=serializer.validated_data["product_id"],
             target_price_cents=serializer.validated_data["target_price_cents"],
             currency_code=serializer.validated_data["currency_code"],
         )
+
+        # Price syncs only re-check products whose price dropped, so a new
+        # alert is checked against today's prices right away.
+        check_price_alerts_for_products.delay([alert.product_id])
+
+        return alert
@@ -0,0 +1,55 @@
+import io
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_rows(
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Loads rows into a PostgreSQL table with ``COPY ... FROM STDIN`` in CSV
+    format, skipping model instances and multi-row INSERT statements.
+    ``None`` values are written as NULL.
+    """
+    buffer = io.StringIO()
+    count = 0
+
+    for row in rows:
+        buffer.write(",".join(map(_format_csv_value, row)) + "\n")
+        count += 1
+
+    if not count:
+        return 0
+
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    sql = (
+        f"COPY {quote_name(table)} ({', '.join(map(quote_name, columns))}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+
+        if hasattr(raw_cursor, "copy_expert"):
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    return count
+
+
+def _format_csv_value(value: Any) -> str:
+    # In COPY's CSV format only an unquoted empty value is NULL, so every
+    # other value is quoted to keep empty strings intact.
+    if value is None:
+        return ""
+
+    return '"' + str(value).replace('"', '""') + '"'
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import IO, Any, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+T = TypeVar("T")
+
+
+class AsyncHttpClient:
+    """
+    Process-wide pooled ``httpx.AsyncClient`` usable from synchronous code.
+
+    The client runs on a background event loop thread, so keep-alive
+    connections are reused across task runs, and requests to the same host
+    share a concurrency limit.
+    """
+
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, timeout: float, max_connections: int, per_host_limit: int):
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> Future[T]:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        async with self._get_host_limit(url):
+            return await self._get_client().get(url, **kwargs)
+
+    async def download(
+        self, url: str, file: IO[bytes], digest: Any = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Streams a successful response body into ``file`` instead of keeping it
+        in memory; the returned response has no content. When given, the
+        hashlib ``digest`` is updated with the body as it arrives.
+
+        Chunks are written and hashed on a worker thread, so spilling a large
+        body to disk does not stall other requests on the event loop.
+        """
+        async with self._get_host_limit(url):
+            async with self._get_client().stream("GET", url, **kwargs) as response:
+                if response.is_success:
+                    async for chunk in response.aiter_bytes(self.DOWNLOAD_CHUNK_SIZE):
+                        await asyncio.to_thread(self._write_chunk, file, digest, chunk)
+
+                return response
+
+    @staticmethod
+    def _write_chunk(file: IO[bytes], digest: Any, chunk: bytes) -> None:
+        file.write(chunk)
+
+        if digest is not None:
+            digest.update(chunk)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # Worker processes are forked, and the loop thread does not survive
+            # the fork, so every process starts its own loop and client.
+            if self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._client = None
+                self._host_limits = {}
+                self._pid = os.getpid()
+
+                threading.Thread(
+                    target=self._loop.run_forever, name="http-client", daemon=True
+                ).start()
+
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                ),
+            )
+
+        return self._client
+
+    def _get_host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self._per_host_limit)
+
+        return self._host_limits[host]
+
+
+class AsyncRateLimiter:
+    """
+    Spaces out the start of requests to at most ``rate`` per second on the
+    client's event loop.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = asyncio.get_running_loop().time()
+        start_at = max(now, self._next_at)
+        self._next_at = start_at + self._interval
+
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+http_client = AsyncHttpClient(
+    timeout=settings.HTTP_CLIENT_TIMEOUT,
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    per_host_limit=settings.HTTP_CLIENT_PER_HOST_LIMIT,
+)
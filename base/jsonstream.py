@@ -0,0 +1,123 @@
+import json
+import re
+from collections.abc import Iterator
+from typing import IO, Any
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JsonStreamReader:
+    """
+    Decodes JSON values one at a time from a text stream, keeping only the
+    unread part of the current chunk in memory.
+    """
+
+    def __init__(self, stream: IO[str], chunk_size: int = 64 * 1024):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                raise json.JSONDecodeError(
+                    "Unexpected end of JSON input", self._buffer, self._pos
+                )
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self._buffer, self._pos)
+
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number may continue in the next chunk, also when the buffer ends
+            # right after its ".", "e" or sign, which decodes as a shorter number.
+            if self._is_number(value) and self._is_buffer_tail(end) and self._fill():
+                continue
+
+            self._pos = end
+
+            return value
+
+    def _is_number(self, value: Any) -> bool:
+        return isinstance(value, int | float) and not isinstance(value, bool)
+
+    def _is_buffer_tail(self, end: int) -> bool:
+        return _NUMBER_TAIL.match(self._buffer, end).end() == len(self._buffer)
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        chunk = self._stream.read(self._chunk_size)
+
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+
+        return True
+
+
+def iter_json_array(
+    stream: IO[str], key: str | None = None, chunk_size: int = 64 * 1024
+) -> Iterator[Any]:
+    """
+    Yields the items of a JSON array without loading the whole document.
+
+    With ``key`` the document must be an object and the array is read from
+    that top-level key; a missing key yields nothing.
+    """
+    reader = JsonStreamReader(stream, chunk_size)
+
+    if key is not None:
+        reader.expect("{")
+
+        while reader.peek() != "}":
+            name = reader.value()
+            reader.expect(":")
+
+            if name == key:
+                break
+
+            reader.value()
+
+            if reader.peek() != "}":
+                reader.expect(",")
+        else:
+            return
+
+    reader.expect("[")
+
+    if reader.peek() == "]":
+        return
+
+    while True:
+        yield reader.value()
+
+        if reader.peek() == "]":
+            return
+
+        reader.expect(",")
@@ -0,0 +1,71 @@
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from typing import TypeVar
+
+from django.db import connections
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def iter_in_background(iterable: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Consumes ``iterable`` on a background thread and yields its items through
+    a bounded queue, so producing the next items overlaps with the caller's
+    work on the current one.
+
+    Errors raised by the producer are re-raised in the caller.
+    """
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+
+            return True
+
+        return False
+
+    def produce() -> None:
+        result = _DONE
+
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as error:
+            result = _Failure(error)
+        finally:
+            # Database connections are per thread and would otherwise leak.
+            connections.close_all()
+
+        put(result)
+
+    thread = threading.Thread(target=produce, name="pipeline", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = items.get()
+
+            if item is _DONE:
+                return
+
+            if isinstance(item, _Failure):
+                raise item.error
+
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
@@ -12,9 +12,13 @@ app.autodiscover_tasks()
 
 @worker_ready.connect
 def on_worker_ready(sender, **kwargs):
+    # Only workers on the default queue run the startup sync, so starting a
+    # dedicated worker (e.g. for notifications) does not sync a second time.
+    if sender.app.conf.task_default_queue not in sender.app.amqp.queues.consume_from:
+        return
+
     job = group(
         signature("currencies.tasks.sync_exchange_rates_for_date"),
-        signature("products.tasks.import_all_products"),
-        signature("prices.tasks.sync_all_store_prices"),
+        signature("prices.tasks.sync_catalogue"),
     )
     job.apply_async()
@@ -92,21 +92,46 @@ SPECTACULAR_SETTINGS = {
     "SCHEMA_PATH_PREFIX": "/api/v[0-9]",
 }
 
+HTTP_CLIENT_TIMEOUT = 10
+HTTP_CLIENT_MAX_CONNECTIONS = 100
+HTTP_CLIENT_PER_HOST_LIMIT = 4
+
+STORE_FEED_CHUNK_SIZE = 5000
+STORE_FEED_QUEUE_SIZE = 4
+
+PRODUCT_STORE_ID_CACHE_TTL = 24 * 60 * 60
+STORE_FEED_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
 STORE_APIS = {
     "dummyjson": "https://dummyjson.com/products",
     "fakestore": "https://fakestoreapi.com/products",
 }
 
+PRICE_SYNC_CHANGES_ONLY = True
+PRICE_SNAPSHOT_PARTITIONS_AHEAD = 3
+PRICE_SNAPSHOT_RETENTION_MONTHS = 24
+
 EXCHANGE_RATE_API_URL = "https://bank.gov.ua/NBUStatService/v1/statdirectory/exchange"
+EXCHANGE_RATE_CACHE_TTL = 300
+EXCHANGE_RATE_BACKFILL_RATE_LIMIT = 10
+
+ALERT_NOTIFICATION_BATCH_SIZE = 100
+ALERT_NOTIFICATION_RATE_LIMIT = "60/m"
+ALERT_NOTIFICATION_MAX_RETRIES = 5
+ALERT_NOTIFICATION_RETRY_DELAY = 60
 
 CELERY_BEAT_SCHEDULE = {
-    "import-all-products-every-hour": {
-        "task": "products.tasks.import_all_products",
+    "sync-catalogue-every-hour": {
+        "task": "prices.tasks.sync_catalogue",
         "schedule": 3600.0,
     },
-    "sync-all-store-prices-every-hour": {
-        "task": "prices.tasks.sync_all_store_prices",
-        "schedule": 3600.0,
+    "check-price-alerts-every-day": {
+        "task": "alerts.tasks.check_price_alerts",
+        "schedule": 86400.0,
+    },
+    "maintain-price-partitions-every-day": {
+        "task": "prices.tasks.maintain_price_partitions",
+        "schedule": 86400.0,
     },
     "sync-exchange-rates-every-hour": {
         "task": "currencies.tasks.sync_today_exchange_rates",
@@ -117,3 +142,6 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+CELERY_TASK_ROUTES = {
+    "alerts.tasks.send_price_alert_emails": {"queue": "notifications"},
+}
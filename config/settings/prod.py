@@ -23,6 +23,13 @@ REDIS_URL = os.environ["REDIS_URL"]
 CELERY_BROKER_URL = f"{REDIS_URL}/0"
 CELERY_RESULT_BACKEND = f"{REDIS_URL}/1"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"{REDIS_URL}/2",
+    }
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
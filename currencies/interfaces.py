@@ -8,6 +8,14 @@ class IExchangeRateSyncService(ABC):
     def execute(self, for_date: date | None = None) -> int:
         pass
 
+    @abstractmethod
+    def execute_range(self, start: date, end: date) -> int:
+        pass
+
+    @abstractmethod
+    def backfill(self, start: date, end: date) -> int:
+        pass
+
 
 class ICurrencyConversionService(ABC):
     @abstractmethod
@@ -15,3 +23,27 @@ class ICurrencyConversionService(ABC):
         self, amount_usd_cents: int, currency_code: str, for_date: date | None = None
     ) -> Decimal | None:
         pass
+
+    @abstractmethod
+    def convert_many(
+        self,
+        amounts_cents: list[int],
+        currency_code: str,
+        for_date: date | None = None,
+    ) -> list[Decimal | None]:
+        pass
+
+    @abstractmethod
+    def convert_many_at_dates(
+        self,
+        amounts_cents: list[int],
+        dates: list[date],
+        currency_code: str,
+    ) -> list[Decimal | None]:
+        pass
+
+    @abstractmethod
+    def to_usd_cents(
+        self, amount_cents: int, currency_code: str, for_date: date | None = None
+    ) -> int | None:
+        pass
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from currencies.services import ExchangeRateSyncService
+
+
+class Command(BaseCommand):
+    help = "Fetch exchange rates for dates that have none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "start",
+            type=date.fromisoformat,
+            help="First date to backfill (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            default=None,
+            help="Last date to backfill (YYYY-MM-DD), defaults to today",
+        )
+
+    def handle(self, *args, **options):
+        count = ExchangeRateSyncService().backfill(
+            options["start"], options["end"] or date.today()
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Saved {count} exchange rates"))
@@ -1,35 +1,183 @@
-from datetime import date
-from decimal import Decimal
+import logging
+import time
+from bisect import bisect_right
+from concurrent.futures import as_completed
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
 
 import httpx
 from django.conf import settings
 from django.utils import timezone
 
+from base.http import AsyncRateLimiter, http_client
 from currencies.interfaces import ICurrencyConversionService, IExchangeRateSyncService
 from currencies.models import Currency, ExchangeRate
 from prices.utils import cents_to_usd
 
+logger = logging.getLogger(__name__)
+
+RATE_SCALE = 10**6
+
+
+class ExchangeRateTable:
+    """
+    In-process table of exchange rates per currency, ordered by date.
+
+    Each currency is loaded with a single query and kept for ``ttl`` seconds,
+    so converting many amounts within a request or task costs one query.
+    Only currencies that exist are loaded, and expired ones are evicted.
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._series: dict[str, tuple[float, list[date], list[Decimal]]] = {}
+        self._codes: tuple[float, frozenset[str]] = (0.0, frozenset())
+
+    def get_rate(self, currency_code: str, for_date: date) -> Decimal | None:
+        dates, rates = self._get_series(currency_code.upper())
+        index = bisect_right(dates, for_date)
+
+        if not index:
+            return None
+
+        return rates[index - 1]
+
+    def invalidate(self) -> None:
+        self._series.clear()
+        self._codes = (0.0, frozenset())
+
+    def _get_series(self, currency_code: str) -> tuple[list[date], list[Decimal]]:
+        now = time.monotonic()
+        cached = self._series.get(currency_code)
+
+        if cached and cached[0] > now:
+            return cached[1], cached[2]
+
+        if currency_code not in self._get_codes(now):
+            return [], []
+
+        rows = (
+            ExchangeRate.objects.filter(currency__code=currency_code)
+            .order_by("date")
+            .values_list("date", "rate_to_usd")
+        )
+        dates = [rate_date for rate_date, _ in rows]
+        rates = [rate for _, rate in rows]
+
+        self._series = {
+            code: series for code, series in self._series.items() if series[0] > now
+        }
+        self._series[currency_code] = (now + self._ttl, dates, rates)
+
+        return dates, rates
+
+    def _get_codes(self, now: float) -> frozenset[str]:
+        expires_at, codes = self._codes
+
+        if expires_at <= now:
+            codes = frozenset(Currency.objects.values_list("code", flat=True))
+            self._codes = (now + self._ttl, codes)
+
+        return codes
+
+
+_RATE_TABLE = ExchangeRateTable(ttl=settings.EXCHANGE_RATE_CACHE_TTL)
+
+
+_CURRENCY_IDS: dict[str, int] = {}
+
 
 class ExchangeRateSyncService(IExchangeRateSyncService):
-    def _fetch_nbu_rates(self, for_date: date) -> list[dict]:
+    def __init__(
+        self,
+        rate_table: ExchangeRateTable | None = None,
+        currency_ids: dict[str, int] | None = None,
+    ):
+        self._rate_table = rate_table or _RATE_TABLE
+        self._currency_ids = _CURRENCY_IDS if currency_ids is None else currency_ids
+
+    async def _fetch_nbu_rates(
+        self, for_date: date, rate_limiter: AsyncRateLimiter | None = None
+    ) -> tuple[date, list[dict]]:
         params = {"json": "", "date": for_date.strftime("%Y%m%d")}
 
-        with httpx.Client(timeout=10) as client:
-            response = client.get(settings.EXCHANGE_RATE_API_URL, params=params)
-            response.raise_for_status()
+        if rate_limiter is not None:
+            await rate_limiter.wait()
 
-            return response.json()
+        response = await http_client.get(settings.EXCHANGE_RATE_API_URL, params=params)
+        response.raise_for_status()
+
+        return for_date, response.json()
 
     def execute(self, for_date: date | None = None) -> int:
         target_date = for_date or date.today()
-        raw_rates = self._fetch_nbu_rates(target_date)
 
-        usd_rate = [r for r in raw_rates if r["cc"] == "USD"][0]
+        return self.execute_range(target_date, target_date)
+
+    def execute_range(self, start: date, end: date) -> int:
+        return self._sync_dates(self._get_dates(start, end))
+
+    def backfill(self, start: date, end: date) -> int:
+        """
+        Syncs the dates in the range that have no rates yet. Rates of a date
+        are written in one statement, so a date is either complete or absent.
+        """
+        synced_dates = set(
+            ExchangeRate.objects.filter(
+                date__range=(start, end), currency__code="USD"
+            ).values_list("date", flat=True)
+        )
+        missing_dates = [
+            rate_date
+            for rate_date in self._get_dates(start, end)
+            if rate_date not in synced_dates
+        ]
+
+        return self._sync_dates(
+            missing_dates,
+            AsyncRateLimiter(settings.EXCHANGE_RATE_BACKFILL_RATE_LIMIT),
+        )
+
+    def _get_dates(self, start: date, end: date) -> list[date]:
+        return [start + timedelta(days=day) for day in range((end - start).days + 1)]
+
+    def _sync_dates(
+        self, dates: list[date], rate_limiter: AsyncRateLimiter | None = None
+    ) -> int:
+        count = 0
+
+        future_to_date = {
+            http_client.submit(
+                self._fetch_nbu_rates(rate_date, rate_limiter)
+            ): rate_date
+            for rate_date in dates
+        }
+
+        for future in as_completed(future_to_date):
+            rate_date = future_to_date[future]
+            try:
+                rate_date, raw_rates = future.result()
+            except (httpx.HTTPError, ValueError):
+                logger.exception(f"Failed to fetch exchange rates for {rate_date}")
+                continue
+
+            try:
+                count += self._save_rates(rate_date, raw_rates)
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                logger.exception(f"Malformed exchange rates for {rate_date}")
+                continue
+
+        if count:
+            self._rate_table.invalidate()
+
+        return count
+
+    def _save_rates(self, rate_date: date, raw_rates: list[dict]) -> int:
+        usd_rate = next((r for r in raw_rates if r["cc"] == "USD"), None)
         if not usd_rate:
             return 0
 
         usd_to_uah = Decimal(str(usd_rate["rate"]))
-        count = 0
 
         # Add UAH rate, cause NBU doesn't provide it
         uah_rate = {
@@ -37,40 +185,120 @@ class ExchangeRateSyncService(IExchangeRateSyncService):
             "txt": "Українська гривня",
             "rate": 1,
         }
-        raw_rates.append(uah_rate)
+        raw_rates = [*raw_rates, uah_rate]
+
+        currency_ids = self._get_currency_ids(
+            {item["cc"]: item["txt"] for item in raw_rates}
+        )
 
-        for item in raw_rates:
-            currency, _ = Currency.objects.get_or_create(
-                code=item["cc"],
-                defaults={"name": item["txt"]},
+        rates = ExchangeRate.objects.bulk_create(
+            [
+                ExchangeRate(
+                    currency_id=currency_ids[item["cc"]],
+                    date=rate_date,
+                    rate_to_usd=(
+                        Decimal(str(item["rate"]))
+                        / Decimal(str(item.get("units", 1)))
+                        / usd_to_uah
+                    ),
+                )
+                for item in raw_rates
+            ],
+            update_conflicts=True,
+            unique_fields=["currency", "date"],
+            update_fields=["rate_to_usd"],
+        )
+
+        return len(rates)
+
+    def _get_currency_ids(self, currencies: dict[str, str]) -> dict[str, int]:
+        missing_codes = currencies.keys() - self._currency_ids.keys()
+
+        if missing_codes:
+            Currency.objects.bulk_create(
+                [Currency(code=code, name=currencies[code]) for code in missing_codes],
+                ignore_conflicts=True,
             )
-            rate_uah = Decimal(str(item["rate"])) / Decimal(str(item.get("units", 1)))
-            ExchangeRate.objects.update_or_create(
-                currency=currency,
-                date=target_date,
-                defaults={"rate_to_usd": rate_uah / usd_to_uah},
+            self._currency_ids.update(
+                Currency.objects.filter(code__in=missing_codes).values_list(
+                    "code", "id"
+                )
             )
-            count += 1
 
-        return count
+        return self._currency_ids
 
 
 class CurrencyConversionService(ICurrencyConversionService):
+    def __init__(self, rate_table: ExchangeRateTable | None = None):
+        self._rate_table = rate_table or _RATE_TABLE
+
     def convert(
         self, amount_cents: int, currency_code: str, for_date: date | None = None
     ) -> Decimal | None:
-        amount_usd = cents_to_usd(amount_cents)
-
-        if currency_code.upper() == "USD":
-            return amount_usd
+        return self.convert_many([amount_cents], currency_code, for_date)[0]
 
+    def convert_many(
+        self,
+        amounts_cents: list[int],
+        currency_code: str,
+        for_date: date | None = None,
+    ) -> list[Decimal | None]:
         target_date = for_date or timezone.now().date()
 
-        rate = ExchangeRate.objects.filter(
-            currency__code=currency_code.upper(), date__lte=target_date
-        ).latest("date")
+        return self.convert_many_at_dates(
+            amounts_cents, [target_date] * len(amounts_cents), currency_code
+        )
+
+    def to_usd_cents(
+        self, amount_cents: int, currency_code: str, for_date: date | None = None
+    ) -> int | None:
+        if currency_code.upper() == "USD":
+            return amount_cents
+
+        rate = self._rate_table.get_rate(
+            currency_code, for_date or timezone.now().date()
+        )
 
         if not rate:
             return None
 
-        return round(amount_usd / rate.rate_to_usd, 2)
+        return int((amount_cents * rate).quantize(Decimal(1), ROUND_HALF_UP))
+
+    def convert_many_at_dates(
+        self,
+        amounts_cents: list[int],
+        dates: list[date],
+        currency_code: str,
+    ) -> list[Decimal | None]:
+        if currency_code.upper() == "USD":
+            return [cents_to_usd(amount) for amount in amounts_cents]
+
+        # Rates are stored with 6 decimal places, so the conversion can be done
+        # on integers: cents * 10^6 / micro-rate gives cents of the target
+        # currency, rounded half-even like ``round(Decimal, 2)``.
+        rates_micro = {}
+
+        for rate_date in set(dates):
+            rate = self._rate_table.get_rate(currency_code, rate_date)
+            rates_micro[rate_date] = int(rate * RATE_SCALE) if rate else 0
+
+        return [
+            Decimal(
+                self._divide_half_even(amount * RATE_SCALE, rates_micro[rate_date])
+            ).scaleb(-2)
+            if rates_micro[rate_date]
+            else None
+            for amount, rate_date in zip(amounts_cents, dates)
+        ]
+
+    @staticmethod
+    def _divide_half_even(numerator: int, denominator: int) -> int:
+        quotient, remainder = divmod(numerator, denominator)
+        doubled_remainder = remainder * 2
+
+        if doubled_remainder > denominator or (
+            doubled_remainder == denominator and quotient % 2
+        ):
+            quotient += 1
+
+        return quotient
@@ -1,15 +1,39 @@
-from celery import shared_task
+from datetime import date
+
+from celery import shared_task, signature
 
 
 @shared_task
 def sync_today_exchange_rates():
     from currencies.services import ExchangeRateSyncService
 
-    return ExchangeRateSyncService().execute()
+    result = ExchangeRateSyncService().execute()
+
+    signature("alerts.tasks.refresh_alert_target_prices").apply_async()
+
+    return result
 
 
 @shared_task
 def sync_exchange_rates_for_date(date):
     from currencies.services import ExchangeRateSyncService
 
-    return ExchangeRateSyncService().execute(for_date=date)
+    result = ExchangeRateSyncService().execute(for_date=date)
+
+    signature("alerts.tasks.refresh_alert_target_prices").apply_async()
+
+    return result
+
+
+@shared_task
+def backfill_exchange_rates(start, end=None):
+    from currencies.services import ExchangeRateSyncService
+
+    result = ExchangeRateSyncService().backfill(
+        date.fromisoformat(start),
+        date.fromisoformat(end) if end else date.today(),
+    )
+
+    signature("alerts.tasks.refresh_alert_target_prices").apply_async()
+
+    return result
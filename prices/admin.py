@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from prices.models import PriceSnapshot
+from prices.models import CurrentPrice, DailyPrice, PriceSnapshot
 
 
 @admin.register(PriceSnapshot)
@@ -8,3 +8,24 @@ class PriceSnapshotAdmin(admin.ModelAdmin):
     list_display = ("product_store", "price_cents", "created_at")
     list_filter = ("product_store__store",)
     ordering = ("-created_at",)
+
+
+@admin.register(DailyPrice)
+class DailyPriceAdmin(admin.ModelAdmin):
+    list_display = (
+        "product_store",
+        "date",
+        "min_price_cents",
+        "max_price_cents",
+        "count",
+        "last_price_cents",
+    )
+    list_filter = ("product_store__store",)
+    ordering = ("-date",)
+
+
+@admin.register(CurrentPrice)
+class CurrentPriceAdmin(admin.ModelAdmin):
+    list_display = ("product_store", "price_cents", "observed_at", "changed_at")
+    list_filter = ("product_store__store",)
+    ordering = ("-observed_at",)
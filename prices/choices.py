@@ -6,3 +6,9 @@ class TrendChoices(TextChoices):
     STABLE = "stable"
     DOWN = "down"
     UNKNOWN = "unknown"
+
+
+class ResolutionChoices(TextChoices):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
@@ -1,7 +1,11 @@
 import datetime
+from collections.abc import Iterable
 from dataclasses import dataclass
 from decimal import Decimal
 
+from prices.choices import TrendChoices
+from products.dtos import FeedStateDTO
+
 
 @dataclass(frozen=True)
 class ProductPriceDTO:
@@ -9,6 +13,12 @@ class ProductPriceDTO:
     price: Decimal
 
 
+@dataclass(frozen=True)
+class ProductStorePriceDTO:
+    product_store_id: int
+    price_cents: int
+
+
 @dataclass(frozen=True)
 class StorePriceDTO:
     store_name: str
@@ -28,3 +38,63 @@ class StorePriceHistoryDTO:
     store_slug: str
     price_cents: int
     created_at: datetime.datetime
+
+
+@dataclass(frozen=True)
+class PriceSummaryDTO:
+    min_price_cents: int | None
+    max_price_cents: int | None
+    average_30_days_cents: int | None
+    trend: TrendChoices
+
+
+@dataclass(frozen=True)
+class DailyAveragePriceDTO:
+    date: datetime.date
+    price_cents: int
+
+
+@dataclass(frozen=True)
+class PriceHistoryFilterDTO:
+    store_slug: str | None = None
+    start: datetime.datetime | None = None
+    end: datetime.datetime | None = None
+
+
+@dataclass(frozen=True)
+class PriceHistoryPageDTO:
+    items: list[StorePriceHistoryDTO]
+    next_cursor: str | None
+
+
+@dataclass(frozen=True)
+class PriceBucketDTO:
+    store_name: str
+    store_slug: str
+    bucket_start: datetime.datetime
+    open_price_cents: int
+    min_price_cents: int
+    max_price_cents: int
+    close_price_cents: int
+    count: int
+
+
+@dataclass(frozen=True)
+class StorePriceFeedDTO:
+    prices: Iterable[ProductPriceDTO]
+    state: FeedStateDTO
+    modified: bool = True
+
+
+@dataclass(frozen=True)
+class PriceSyncResultDTO:
+    prices_saved: int
+    price_drop_product_ids: list[int]
+
+
+@dataclass(frozen=True)
+class CatalogueSyncResultDTO:
+    products_created: int
+    prices_saved: int
+    stores_unchanged: int
+    price_drop_product_ids: list[int]
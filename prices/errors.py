@@ -0,0 +1,6 @@
+class PriceQueryError(Exception):
+    pass
+
+
+class InvalidCursorError(PriceQueryError):
+    pass
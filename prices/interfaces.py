@@ -1,24 +1,82 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
 from decimal import Decimal
 
-from prices.choices import TrendChoices
+from prices.choices import ResolutionChoices, TrendChoices
 from prices.dtos import (
+    CatalogueSyncResultDTO,
+    DailyAveragePriceDTO,
+    PriceBucketDTO,
+    PriceHistoryFilterDTO,
+    PriceHistoryPageDTO,
     PriceRangeDTO,
+    PriceSummaryDTO,
+    PriceSyncResultDTO,
     ProductPriceDTO,
+    ProductStorePriceDTO,
     StorePriceDTO,
+    StorePriceFeedDTO,
     StorePriceHistoryDTO,
 )
+from products.dtos import FeedStateDTO
+from products.models import Store
 
 
 class IStorePriceFetcher(ABC):
     @abstractmethod
-    def fetch(self) -> list[ProductPriceDTO]:
+    async def fetch(self, state: FeedStateDTO | None = None) -> StorePriceFeedDTO:
+        pass
+
+
+class IPriceSnapshotWriter(ABC):
+    @abstractmethod
+    def write(self, prices: list[ProductStorePriceDTO]) -> int:
         pass
 
 
 class IPriceSyncService(ABC):
     @abstractmethod
-    def execute(self) -> int:
+    def execute(self) -> PriceSyncResultDTO:
+        pass
+
+    @abstractmethod
+    def sync_store(
+        self,
+        store: Store,
+        product_prices: Iterable[ProductPriceDTO],
+        observed_at: datetime | None = None,
+    ) -> PriceSyncResultDTO:
+        pass
+
+    @abstractmethod
+    def refresh_store(self, store: Store) -> int:
+        pass
+
+
+class ICatalogueSyncService(ABC):
+    @abstractmethod
+    def execute(self) -> CatalogueSyncResultDTO:
+        pass
+
+
+class IPriceRollupService(ABC):
+    @abstractmethod
+    def record(self, prices: list[ProductStorePriceDTO], day: date) -> int:
+        pass
+
+    @abstractmethod
+    def rebuild(self) -> int:
+        pass
+
+
+class IPricePartitionService(ABC):
+    @abstractmethod
+    def ensure_partitions(self, months_ahead: int) -> list[str]:
+        pass
+
+    @abstractmethod
+    def drop_expired_partitions(self, retention_months: int) -> list[str]:
         pass
 
 
@@ -40,5 +98,42 @@ class IPriceQueryService(ABC):
         pass
 
     @abstractmethod
-    def get_history(self, product_id: int) -> list[StorePriceHistoryDTO]:
+    def get_summaries(self, product_ids: list[int]) -> dict[int, PriceSummaryDTO]:
+        pass
+
+    @abstractmethod
+    def get_history(
+        self, product_id: int, filters: PriceHistoryFilterDTO | None = None
+    ) -> list[StorePriceHistoryDTO]:
+        pass
+
+    @abstractmethod
+    def get_history_page(
+        self,
+        product_id: int,
+        filters: PriceHistoryFilterDTO,
+        cursor: str | None,
+        limit: int,
+    ) -> PriceHistoryPageDTO:
+        pass
+
+    @abstractmethod
+    def iter_history(
+        self, product_id: int, filters: PriceHistoryFilterDTO, chunk_size: int
+    ) -> Iterator[StorePriceHistoryDTO]:
+        pass
+
+    @abstractmethod
+    def get_history_bucketed(
+        self,
+        product_id: int,
+        bucket: ResolutionChoices,
+        filters: PriceHistoryFilterDTO | None = None,
+    ) -> list[PriceBucketDTO]:
+        pass
+
+    @abstractmethod
+    def get_daily_averages(
+        self, product_id: int, filters: PriceHistoryFilterDTO | None = None
+    ) -> list[DailyAveragePriceDTO]:
         pass
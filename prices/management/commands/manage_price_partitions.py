@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from prices.services import PricePartitionService
+
+
+class Command(BaseCommand):
+    help = "Create upcoming price snapshot partitions and drop expired ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.PRICE_SNAPSHOT_PARTITIONS_AHEAD,
+            help="Number of future monthly partitions to create",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.PRICE_SNAPSHOT_RETENTION_MONTHS,
+            help="Drop partitions older than this many months (0 keeps all)",
+        )
+
+    def handle(self, *args, **options):
+        service = PricePartitionService()
+
+        for name in service.ensure_partitions(options["months_ahead"]):
+            self.stdout.write(self.style.SUCCESS(f"Created partition {name}"))
+
+        if options["retention_months"]:
+            for name in service.drop_expired_partitions(options["retention_months"]):
+                self.stdout.write(self.style.WARNING(f"Dropped partition {name}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from prices.services import DailyPriceRollupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild daily price rollups from change-only price snapshots. "
+        "Minimum, maximum and last prices are restored; observation counts "
+        "are not, so every price counts once per day"
+    )
+
+    def handle(self, *args, **options):
+        count = DailyPriceRollupService().rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily price rollups"))
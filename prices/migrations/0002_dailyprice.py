@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 20:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prices', '0001_initial'),
+        ('products', '0003_alter_productstore_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('min_price_cents', models.PositiveIntegerField()),
+                ('max_price_cents', models.PositiveIntegerField()),
+                ('sum_price_cents', models.PositiveBigIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                ('last_price_cents', models.PositiveIntegerField()),
+                ('product_store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='products.productstore')),
+            ],
+            options={
+                'db_table': 'daily_prices',
+                'constraints': [models.UniqueConstraint(fields=('product_store', 'date'), name='unique_product_store_date')],
+            },
+        ),
+    ]
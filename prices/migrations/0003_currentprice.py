@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 20:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prices', '0002_dailyprice'),
+        ('products', '0003_alter_productstore_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentPrice',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product_store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_price', serialize=False, to='products.productstore')),
+                ('price_cents', models.PositiveIntegerField()),
+                ('observed_at', models.DateTimeField()),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'current_prices',
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO current_prices (
+                product_store_id, price_cents, observed_at, changed_at, created_at, updated_at
+            )
+            SELECT DISTINCT ON (product_store_id)
+                product_store_id, price_cents, created_at, created_at, NOW(), NOW()
+            FROM price_snapshots
+            ORDER BY product_store_id, created_at DESC
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:05
+
+from datetime import timedelta
+
+from django.db import migrations
+
+PARTITIONS_AHEAD = 3
+
+
+def partition_price_snapshots(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            ALTER TABLE price_snapshots RENAME TO price_snapshots_unpartitioned;
+            ALTER SEQUENCE price_snapshots_id_seq
+                RENAME TO price_snapshots_unpartitioned_id_seq;
+            ALTER INDEX price_snaps_product_99a208_idx
+                RENAME TO price_snapshots_unpartitioned_product_idx;
+
+            CREATE SEQUENCE price_snapshots_id_seq;
+            CREATE TABLE price_snapshots (
+                id bigint NOT NULL DEFAULT nextval('price_snapshots_id_seq'),
+                created_at timestamp with time zone NOT NULL,
+                updated_at timestamp with time zone NOT NULL,
+                price_cents integer NOT NULL CHECK (price_cents >= 0),
+                product_store_id bigint NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+            ALTER SEQUENCE price_snapshots_id_seq OWNED BY price_snapshots.id;
+            ALTER TABLE price_snapshots
+                ADD CONSTRAINT price_snapshots_product_store_id_fk_product_stores_id
+                FOREIGN KEY (product_store_id) REFERENCES product_stores (id)
+                DEFERRABLE INITIALLY DEFERRED;
+            CREATE INDEX price_snaps_product_99a208_idx
+                ON price_snapshots (product_store_id, created_at);
+            CREATE TABLE price_snapshots_default PARTITION OF price_snapshots DEFAULT;
+
+            SELECT setval(
+                'price_snapshots_id_seq',
+                COALESCE((SELECT MAX(id) FROM price_snapshots_unpartitioned), 0) + 1,
+                false
+            );
+            """
+        )
+
+        cursor.execute(
+            """
+            SELECT generate_series(
+                date_trunc('month', COALESCE(MIN(created_at), NOW()) AT TIME ZONE 'UTC'),
+                date_trunc('month', NOW() AT TIME ZONE 'UTC')
+                    + make_interval(months => %s),
+                interval '1 month'
+            )::date
+            FROM price_snapshots_unpartitioned
+            """,
+            [PARTITIONS_AHEAD],
+        )
+        months = [month for (month,) in cursor.fetchall()]
+
+        for month in months:
+            next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+            cursor.execute(
+                f"""
+                CREATE TABLE price_snapshots_p{month:%Y%m}
+                PARTITION OF price_snapshots
+                FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00')
+                TO ('{next_month:%Y-%m-%d} 00:00:00+00')
+                """
+            )
+
+        cursor.execute(
+            """
+            INSERT INTO price_snapshots (
+                id, created_at, updated_at, price_cents, product_store_id
+            )
+            SELECT id, created_at, updated_at, price_cents, product_store_id
+            FROM price_snapshots_unpartitioned;
+
+            DROP TABLE price_snapshots_unpartitioned;
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prices', '0003_currentprice'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_price_snapshots, migrations.RunPython.noop),
+    ]
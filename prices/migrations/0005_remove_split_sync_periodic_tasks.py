@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:10
+
+from django.db import migrations
+
+REPLACED_TASKS = [
+    'import-all-products-every-hour',
+    'sync-all-store-prices-every-hour',
+]
+
+
+def remove_replaced_tasks(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(name__in=REPLACED_TASKS).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_beat', '0001_initial'),
+        ('prices', '0004_partition_price_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_replaced_tasks, migrations.RunPython.noop),
+    ]
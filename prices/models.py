@@ -20,3 +20,46 @@ class PriceSnapshot(BaseTimestampedModel):
 
     def __str__(self):
         return f"{self.product_store} - {self.price_cents}"
+
+
+class DailyPrice(BaseTimestampedModel):
+    product_store = models.ForeignKey(
+        ProductStore,
+        on_delete=models.CASCADE,
+        related_name="daily_prices",
+    )
+    date = models.DateField()
+    min_price_cents = models.PositiveIntegerField()
+    max_price_cents = models.PositiveIntegerField()
+    sum_price_cents = models.PositiveBigIntegerField()
+    count = models.PositiveIntegerField()
+    last_price_cents = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "daily_prices"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product_store", "date"], name="unique_product_store_date"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_store} - {self.date}"
+
+
+class CurrentPrice(BaseTimestampedModel):
+    product_store = models.OneToOneField(
+        ProductStore,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="current_price",
+    )
+    price_cents = models.PositiveIntegerField()
+    observed_at = models.DateTimeField()
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "current_prices"
+
+    def __str__(self):
+        return f"{self.product_store} - {self.price_cents}"
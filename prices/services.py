@@ -1,155 +1,970 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import timedelta
-from decimal import Decimal
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, as_completed
+from dataclasses import replace
+from datetime import UTC, date, datetime, timedelta
+from heapq import merge
+from itertools import batched, chain
 
 import httpx
 from django.conf import settings
-from django.db import models
-from django.db.models import Avg
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q, QuerySet, Sum
 from django.utils import timezone as django_timezone
 
-from prices.choices import TrendChoices
+from base.db import copy_rows
+from base.http import http_client
+from base.pipeline import iter_in_background
+from prices.choices import ResolutionChoices, TrendChoices
 from prices.dtos import (
+    CatalogueSyncResultDTO,
+    DailyAveragePriceDTO,
+    PriceBucketDTO,
+    PriceHistoryFilterDTO,
+    PriceHistoryPageDTO,
     PriceRangeDTO,
+    PriceSummaryDTO,
+    PriceSyncResultDTO,
     ProductPriceDTO,
+    ProductStorePriceDTO,
     StorePriceDTO,
+    StorePriceFeedDTO,
     StorePriceHistoryDTO,
 )
-from prices.interfaces import IPriceQueryService, IPriceSyncService, IStorePriceFetcher
-from prices.models import PriceSnapshot
-from prices.utils import usd_to_cents
+from prices.errors import InvalidCursorError
+from prices.interfaces import (
+    ICatalogueSyncService,
+    IPricePartitionService,
+    IPriceQueryService,
+    IPriceRollupService,
+    IPriceSnapshotWriter,
+    IPriceSyncService,
+    IStorePriceFetcher,
+)
+from prices.models import CurrentPrice, DailyPrice, PriceSnapshot
+from prices.utils import add_months, get_today_start, usd_to_cents
+from products.dtos import FeedStateDTO, ProductDTO, StoreFeedDTO
+from products.interfaces import (
+    IProductImporter,
+    IProductStoreIdCache,
+    IStoreFeedStateService,
+    IStoreFetcher,
+)
 from products.models import ProductStore, Store
+from products.services import (
+    PRODUCT_FETCHERS,
+    ProductImportService,
+    ProductStoreIdCache,
+    StoreFeedStateService,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class DummyJsonPriceFetcher(IStorePriceFetcher):
-    TIMEOUT = 10
+def to_product_prices(products: Iterable[ProductDTO]) -> Iterator[ProductPriceDTO]:
+    return (
+        ProductPriceDTO(external_id=product.id, price=product.price)
+        for product in products
+    )
 
-    def fetch(self) -> list[ProductPriceDTO]:
-        with httpx.Client(timeout=self.TIMEOUT) as client:
-            response = client.get(settings.STORE_APIS["dummyjson"], params={"limit": 0})
-            response.raise_for_status()
-            data = response.json()
 
-        return [
-            ProductPriceDTO(
-                external_id=int(item["id"]),
-                price=Decimal(str(item["price"])),
+class StorePriceFetcher(IStorePriceFetcher):
+    """
+    Reads prices from a store's product feed, so prices and products share a
+    single fetcher implementation per store.
+    """
+
+    def __init__(self, fetcher: IStoreFetcher):
+        self._fetcher = fetcher
+
+    async def fetch(self, state: FeedStateDTO | None = None) -> StorePriceFeedDTO:
+        feed = await self._fetcher.fetch(state)
+
+        return StorePriceFeedDTO(
+            prices=to_product_prices(feed.products),
+            state=feed.state,
+            modified=feed.modified,
+        )
+
+
+_PRICE_FETCHERS: dict[str, IStorePriceFetcher] = {
+    slug: StorePriceFetcher(fetcher) for slug, fetcher in PRODUCT_FETCHERS.items()
+}
+
+
+class DailyPriceRollupService(IPriceRollupService):
+    BATCH_SIZE = 1000
+
+    # Adds the observations to the day's rollups in the database, so
+    # overlapping syncs accumulate instead of overwriting each other.
+    RECORD_SQL = """
+        INSERT INTO daily_prices (
+            product_store_id,
+            date,
+            min_price_cents,
+            max_price_cents,
+            sum_price_cents,
+            count,
+            last_price_cents,
+            created_at,
+            updated_at
+        )
+        SELECT
+            rollups.product_store_id,
+            %(day)s,
+            rollups.min_price_cents,
+            rollups.max_price_cents,
+            rollups.sum_price_cents,
+            rollups.count,
+            rollups.last_price_cents,
+            %(now)s,
+            %(now)s
+        FROM unnest(
+            %(product_store_ids)s::bigint[],
+            %(min_prices)s::integer[],
+            %(max_prices)s::integer[],
+            %(sum_prices)s::bigint[],
+            %(counts)s::integer[],
+            %(last_prices)s::integer[]
+        ) AS rollups (
+            product_store_id,
+            min_price_cents,
+            max_price_cents,
+            sum_price_cents,
+            count,
+            last_price_cents
+        )
+        ON CONFLICT (product_store_id, date) DO UPDATE SET
+            min_price_cents = LEAST(
+                daily_prices.min_price_cents, EXCLUDED.min_price_cents
+            ),
+            max_price_cents = GREATEST(
+                daily_prices.max_price_cents, EXCLUDED.max_price_cents
+            ),
+            sum_price_cents = daily_prices.sum_price_cents + EXCLUDED.sum_price_cents,
+            count = daily_prices.count + EXCLUDED.count,
+            last_price_cents = EXCLUDED.last_price_cents,
+            updated_at = EXCLUDED.updated_at
+    """
+
+    # Snapshots only record price changes, so each price is carried forward
+    # day by day until the next change, or until the product store was last
+    # observed. Prices in effect before the first snapshot are taken from the
+    # last rollup kept before the rebuilt range.
+    REBUILD_SQL = """
+        WITH points AS (
+            SELECT product_store_id, created_at, price_cents
+            FROM price_snapshots
+            UNION ALL
+            (
+                SELECT DISTINCT ON (product_store_id)
+                    product_store_id,
+                    %(start)s,
+                    last_price_cents
+                FROM daily_prices
+                WHERE date < %(start_date)s
+                ORDER BY product_store_id, date DESC
             )
-            for item in data.get("products", [])
-        ]
+        ),
+        spans AS (
+            SELECT
+                product_store_id,
+                price_cents,
+                created_at AS starts_at,
+                LEAD(created_at) OVER (
+                    PARTITION BY product_store_id ORDER BY created_at
+                ) AS ends_at
+            FROM points
+        ),
+        days AS (
+            SELECT
+                spans.product_store_id,
+                spans.price_cents,
+                spans.starts_at,
+                day::date AS date
+            FROM spans
+            LEFT JOIN current_prices
+                ON current_prices.product_store_id = spans.product_store_id
+            CROSS JOIN LATERAL generate_series(
+                (spans.starts_at AT TIME ZONE 'UTC')::date,
+                (
+                    COALESCE(
+                        spans.ends_at - INTERVAL '1 microsecond',
+                        GREATEST(current_prices.observed_at, spans.starts_at)
+                    ) AT TIME ZONE 'UTC'
+                )::date,
+                INTERVAL '1 day'
+            ) AS day
+        )
+        INSERT INTO daily_prices (
+            product_store_id,
+            date,
+            min_price_cents,
+            max_price_cents,
+            sum_price_cents,
+            count,
+            last_price_cents,
+            created_at,
+            updated_at
+        )
+        SELECT
+            product_store_id,
+            date,
+            MIN(price_cents),
+            MAX(price_cents),
+            SUM(price_cents),
+            COUNT(*),
+            (ARRAY_AGG(price_cents ORDER BY starts_at DESC))[1],
+            %(now)s,
+            %(now)s
+        FROM days
+        GROUP BY product_store_id, date
+    """
 
+    def record(self, prices: list[ProductStorePriceDTO], day: date) -> int:
+        if not prices:
+            return 0
 
-class FakeStorePriceFetcher(IStorePriceFetcher):
-    TIMEOUT = 10
+        # product_store_id -> [min, max, sum, count, last]
+        rollups: dict[int, list[int]] = {}
 
-    def fetch(self) -> list[ProductPriceDTO]:
-        with httpx.Client(timeout=self.TIMEOUT) as client:
-            response = client.get(settings.STORE_APIS["fakestore"])
-            response.raise_for_status()
-            data = response.json()
+        for price in prices:
+            rollup = rollups.get(price.product_store_id)
 
-        return [
-            ProductPriceDTO(
-                external_id=int(item["id"]),
-                price=Decimal(str(item["price"])),
+            if rollup is None:
+                cents = price.price_cents
+                rollups[price.product_store_id] = [cents, cents, cents, 1, cents]
+                continue
+
+            rollup[0] = min(rollup[0], price.price_cents)
+            rollup[1] = max(rollup[1], price.price_cents)
+            rollup[2] += price.price_cents
+            rollup[3] += 1
+            rollup[4] = price.price_cents
+
+        now = django_timezone.now()
+
+        with connection.cursor() as cursor:
+            # Rows are locked in a stable order to avoid deadlocks between syncs.
+            for batch in batched(sorted(rollups.items()), self.BATCH_SIZE):
+                product_store_ids, values = zip(*batch)
+                min_prices, max_prices, sum_prices, counts, last_prices = zip(*values)
+
+                cursor.execute(
+                    self.RECORD_SQL,
+                    {
+                        "day": day,
+                        "now": now,
+                        "product_store_ids": list(product_store_ids),
+                        "min_prices": list(min_prices),
+                        "max_prices": list(max_prices),
+                        "sum_prices": list(sum_prices),
+                        "counts": list(counts),
+                        "last_prices": list(last_prices),
+                    },
+                )
+
+        return len(rollups)
+
+    def rebuild(self) -> int:
+        """
+        Rebuilds the days still covered by snapshots from the prices in effect
+        on each day. Minimum, maximum and last prices are restored, but every
+        price counts once per day rather than once per observation, so
+        ``count`` and ``sum_price_cents`` differ from the recorded rollups.
+        """
+        # Snapshots past the retention window are dropped with their partitions,
+        # so only the days still covered by snapshots are rebuilt.
+        first_snapshot_at = PriceSnapshot.objects.aggregate(
+            first_snapshot_at=Min("created_at")
+        )["first_snapshot_at"]
+
+        if first_snapshot_at is None:
+            return 0
+
+        start_date = first_snapshot_at.astimezone(UTC).date()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            DailyPrice.objects.filter(date__gte=start_date).delete()
+            cursor.execute(
+                self.REBUILD_SQL,
+                {
+                    "start": datetime.combine(start_date, datetime.min.time(), UTC),
+                    "start_date": start_date,
+                    "now": django_timezone.now(),
+                },
             )
-            for item in data
-        ]
 
+            return cursor.rowcount
 
-_PRICE_FETCHERS: dict[str, IStorePriceFetcher] = {
-    "dummyjson": DummyJsonPriceFetcher(),
-    "fakestore": FakeStorePriceFetcher(),
-}
 
+class PricePartitionService(IPricePartitionService):
+    """
+    Maintains monthly range partitions of ``price_snapshots`` on ``created_at``.
 
-class PriceSyncService(IPriceSyncService):
-    CONCURRENCY = 10
+    Rows outside of existing partitions land in the default partition and are
+    moved into the matching monthly partition when it is created.
+    """
+
+    TABLE = PriceSnapshot._meta.db_table
+    DEFAULT_PARTITION = f"{TABLE}_default"
+    PARTITION_NAME = re.compile(rf"^{TABLE}_p(?P<year>\d{{4}})(?P<month>\d{{2}})$")
+
+    def ensure_partitions(self, months_ahead: int) -> list[str]:
+        existing = self._get_partitions()
+        current_month = django_timezone.now().date().replace(day=1)
+
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current_month, offset)
+            name = self._get_partition_name(month)
+
+            if name not in existing:
+                self._create_partition(name, month)
+                created.append(name)
+
+        return created
+
+    def drop_expired_partitions(self, retention_months: int) -> list[str]:
+        cutoff = add_months(
+            django_timezone.now().date().replace(day=1), -retention_months
+        )
+
+        dropped = []
+        for name, month in sorted(self._get_partitions().items()):
+            if add_months(month, 1) > cutoff:
+                continue
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {self.TABLE} DETACH PARTITION {name}")
+                cursor.execute(f"DROP TABLE {name}")
+
+            logger.info(f"Dropped price snapshot partition {name}")
+            dropped.append(name)
+
+        return dropped
+
+    def _get_partitions(self) -> dict[str, date]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                """,
+                [self.TABLE],
+            )
+            names = [name for (name,) in cursor.fetchall()]
+
+        partitions = {}
+        for name in names:
+            match = self.PARTITION_NAME.match(name)
+
+            if match:
+                partitions[name] = date(int(match["year"]), int(match["month"]), 1)
+
+        return partitions
+
+    def _get_partition_name(self, month: date) -> str:
+        return f"{self.TABLE}_p{month:%Y%m}"
+
+    def _create_partition(self, name: str, month: date) -> None:
+        start = datetime.combine(month, datetime.min.time(), tzinfo=UTC)
+        end = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=UTC)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {name} "
+                f"(LIKE {self.TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"WITH moved AS ("
+                f"DELETE FROM {self.DEFAULT_PARTITION} "
+                f"WHERE created_at >= %s AND created_at < %s RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved",
+                [start, end],
+            )
+            cursor.execute(
+                f"ALTER TABLE {self.TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+
+        logger.info(f"Created price snapshot partition {name}")
+
+
+class BulkCreatePriceSnapshotWriter(IPriceSnapshotWriter):
+    def write(self, prices: list[ProductStorePriceDTO]) -> int:
+        snapshots = PriceSnapshot.objects.bulk_create(
+            [
+                PriceSnapshot(
+                    product_store_id=price.product_store_id,
+                    price_cents=price.price_cents,
+                )
+                for price in prices
+            ],
+            batch_size=1000,
+        )
+
+        return len(snapshots)
+
+
+class CopyPriceSnapshotWriter(IPriceSnapshotWriter):
+    """
+    Streams snapshots into ``price_snapshots`` with COPY; PostgreSQL only.
+    """
+
+    COLUMNS = ("product_store_id", "price_cents", "created_at", "updated_at")
+
+    def write(self, prices: list[ProductStorePriceDTO]) -> int:
+        created_at = django_timezone.now()
+
+        return copy_rows(
+            PriceSnapshot._meta.db_table,
+            self.COLUMNS,
+            (
+                (price.product_store_id, price.price_cents, created_at, created_at)
+                for price in prices
+            ),
+        )
+
+
+def get_snapshot_writer() -> IPriceSnapshotWriter:
+    if connection.vendor == "postgresql":
+        return CopyPriceSnapshotWriter()
+
+    return BulkCreatePriceSnapshotWriter()
 
-    def __init__(self, fetchers: dict[str, IStorePriceFetcher] | None = None):
+
+class PriceSyncService(IPriceSyncService):
+    def __init__(
+        self,
+        fetchers: dict[str, IStorePriceFetcher] | None = None,
+        rollup: IPriceRollupService | None = None,
+        changes_only: bool | None = None,
+        snapshot_writer: IPriceSnapshotWriter | None = None,
+        product_store_ids: IProductStoreIdCache | None = None,
+    ):
         self._fetchers = fetchers or _PRICE_FETCHERS
+        self._product_store_ids = product_store_ids or ProductStoreIdCache()
+        self._rollup = rollup or DailyPriceRollupService()
+        self._snapshot_writer = snapshot_writer or get_snapshot_writer()
+        self._changes_only = (
+            settings.PRICE_SYNC_CHANGES_ONLY if changes_only is None else changes_only
+        )
 
-    def _fetch_for_store(
+    async def _fetch_for_store(
         self,
         store: Store,
-    ) -> tuple[Store, list[ProductPriceDTO]]:
+    ) -> tuple[Store, Iterable[ProductPriceDTO]]:
         fetcher = self._fetchers.get(store.slug)
 
         if not fetcher:
             return store, []
 
-        items = fetcher.fetch()
+        feed = await fetcher.fetch()
 
-        return store, items
+        return store, feed.prices
 
-    def execute(self) -> int:
+    def execute(self) -> PriceSyncResultDTO:
         stores = Store.objects.all()
 
         total = 0
-        with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
-            future_to_store = {
-                executor.submit(self._fetch_for_store, store): store for store in stores
-            }
+        price_drop_product_ids = set()
+        observed_at = django_timezone.now()
+        future_to_store = {
+            http_client.submit(self._fetch_for_store(store)): store for store in stores
+        }
+
+        # Feeds are parsed and resolved on a background thread while the
+        # resolved chunks are written here, one transaction per chunk.
+        resolved_chunks = iter_in_background(
+            self._iter_resolved_chunks(future_to_store),
+            maxsize=settings.STORE_FEED_QUEUE_SIZE,
+        )
+
+        for store, prices in resolved_chunks:
+            try:
+                result = self._save_prices(prices, observed_at)
+            except Exception:
+                logger.exception(f"Failed to persist prices for store {store.slug}")
+                continue
+
+            total += result.prices_saved
+            price_drop_product_ids.update(result.price_drop_product_ids)
+
+        return PriceSyncResultDTO(
+            prices_saved=total,
+            price_drop_product_ids=sorted(price_drop_product_ids),
+        )
 
-            for future in as_completed(future_to_store):
+    def _iter_resolved_chunks(
+        self, future_to_store: dict[Future, Store]
+    ) -> Iterator[tuple[Store, list[ProductStorePriceDTO]]]:
+        for future in as_completed(future_to_store):
+            store = future_to_store[future]
+            try:
                 store, items = future.result()
+            except httpx.HTTPError:
+                logger.exception(f"Failed to fetch prices for store {store.slug}")
+                continue
 
-                try:
-                    total += self._add_snapshots(store, items)
-                except Exception:
-                    logger.exception(f"Failed to persist prices for store {store.slug}")
-                    continue
+            try:
+                for chunk in batched(items, settings.STORE_FEED_CHUNK_SIZE):
+                    yield store, self._resolve_prices(store, chunk)
+            except Exception:
+                logger.exception(f"Failed to read prices for store {store.slug}")
+                continue
 
-        return total
+    def sync_store(
+        self,
+        store: Store,
+        product_prices: Iterable[ProductPriceDTO],
+        observed_at: datetime | None = None,
+    ) -> PriceSyncResultDTO:
+        observed_at = observed_at or django_timezone.now()
+        saved = 0
+        price_drop_product_ids = set()
 
-    def _add_snapshots(
-        self, store: Store, product_prices: list[ProductPriceDTO]
-    ) -> int:
-        external_ids = {item.external_id for item in product_prices}
-        product_stores = ProductStore.objects.filter(
-            store=store, external_id__in=external_ids
+        for chunk in batched(product_prices, settings.STORE_FEED_CHUNK_SIZE):
+            result = self._save_prices(self._resolve_prices(store, chunk), observed_at)
+            saved += result.prices_saved
+            price_drop_product_ids.update(result.price_drop_product_ids)
+
+        return PriceSyncResultDTO(
+            prices_saved=saved,
+            price_drop_product_ids=sorted(price_drop_product_ids),
         )
-        product_store_map = {item.external_id: item for item in product_stores}
 
-        snapshots = [
-            PriceSnapshot(
-                product_store=product_store_map[item.external_id],
+    def _save_prices(
+        self, prices: list[ProductStorePriceDTO], observed_at: datetime
+    ) -> PriceSyncResultDTO:
+        # Snapshots, current prices and the rollup of a chunk commit together,
+        # so a failed chunk leaves nothing behind to be skipped on the next run.
+        with transaction.atomic():
+            saved, dropped_product_store_ids = self._add_snapshots(prices, observed_at)
+            self._rollup.record(prices, observed_at.date())
+
+        price_drop_product_ids = []
+        if dropped_product_store_ids:
+            price_drop_product_ids = list(
+                ProductStore.objects.filter(id__in=dropped_product_store_ids)
+                .values_list("product_id", flat=True)
+                .distinct()
+            )
+
+        return PriceSyncResultDTO(
+            prices_saved=saved, price_drop_product_ids=price_drop_product_ids
+        )
+
+    def refresh_store(self, store: Store) -> int:
+        """
+        Re-observes the prices from the last sync of a store whose feed has
+        not changed since, so they keep counting as today's prices.
+        """
+        observed_at = django_timezone.now()
+        current_prices = CurrentPrice.objects.filter(product_store__store=store)
+        last_observed_at = current_prices.aggregate(last=Max("observed_at"))["last"]
+
+        if last_observed_at is None:
+            return 0
+
+        current_prices = current_prices.filter(observed_at=last_observed_at)
+        prices = [
+            ProductStorePriceDTO(product_store_id=product_store_id, price_cents=price)
+            for product_store_id, price in current_prices.values_list(
+                "product_store_id", "price_cents"
+            )
+        ]
+
+        with transaction.atomic():
+            current_prices.update(observed_at=observed_at, updated_at=observed_at)
+            self._rollup.record(prices, observed_at.date())
+
+        return len(prices)
+
+    def _resolve_prices(
+        self, store: Store, product_prices: Sequence[ProductPriceDTO]
+    ) -> list[ProductStorePriceDTO]:
+        product_store_map = self._product_store_ids.get_many(
+            store.id, {item.external_id for item in product_prices}
+        )
+
+        return [
+            ProductStorePriceDTO(
+                product_store_id=product_store_map[item.external_id],
                 price_cents=usd_to_cents(item.price),
             )
             for item in product_prices
             if item.external_id in product_store_map
         ]
-        PriceSnapshot.objects.bulk_create(
-            snapshots, batch_size=1000, ignore_conflicts=True
+
+    def _add_snapshots(
+        self, prices: list[ProductStorePriceDTO], observed_at: datetime
+    ) -> tuple[int, set[int]]:
+        """
+        Returns the number of snapshots written and the product stores whose
+        price dropped or was seen for the first time. Runs inside the chunk's
+        transaction.
+        """
+        latest_prices = {price.product_store_id: price.price_cents for price in prices}
+
+        current_prices = CurrentPrice.objects.in_bulk(latest_prices.keys())
+
+        def is_unchanged(product_store_id: int, price_cents: int) -> bool:
+            current_price = current_prices.get(product_store_id)
+
+            return (
+                current_price is not None and current_price.price_cents == price_cents
+            )
+
+        if self._changes_only:
+            prices = [
+                price
+                for price in prices
+                if not is_unchanged(price.product_store_id, price.price_cents)
+            ]
+
+        saved = self._snapshot_writer.write(prices)
+        dropped_product_store_ids = {
+            product_store_id
+            for product_store_id, price_cents in latest_prices.items()
+            if product_store_id not in current_prices
+            or price_cents < current_prices[product_store_id].price_cents
+        }
+
+        CurrentPrice.objects.bulk_create(
+            [
+                CurrentPrice(
+                    product_store_id=product_store_id,
+                    price_cents=price_cents,
+                    observed_at=observed_at,
+                    changed_at=(
+                        current_prices[product_store_id].changed_at
+                        if is_unchanged(product_store_id, price_cents)
+                        else observed_at
+                    ),
+                )
+                for product_store_id, price_cents in latest_prices.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["product_store"],
+            update_fields=[
+                "price_cents",
+                "observed_at",
+                "changed_at",
+                "updated_at",
+            ],
         )
 
-        return len(snapshots)
+        return saved, dropped_product_store_ids
+
+
+class CatalogueSyncService(ICatalogueSyncService):
+    """
+    Fetches every store feed once per cycle and hands the parsed records to
+    both the product importer and the price sync.
+    """
+
+    def __init__(
+        self,
+        fetchers: dict[str, IStoreFetcher] | None = None,
+        importer: IProductImporter | None = None,
+        price_sync: IPriceSyncService | None = None,
+        feed_states: IStoreFeedStateService | None = None,
+    ):
+        self._fetchers = fetchers or PRODUCT_FETCHERS
+        self._importer = importer or ProductImportService(fetchers=self._fetchers)
+        self._price_sync = price_sync or PriceSyncService()
+        self._feed_states = feed_states or StoreFeedStateService()
+
+    async def _fetch_for_store(
+        self, store: Store, state: FeedStateDTO | None
+    ) -> tuple[Store, StoreFeedDTO | None]:
+        fetcher = self._fetchers.get(store.slug)
+
+        if not fetcher:
+            return store, None
+
+        feed = await fetcher.fetch(state)
+
+        return store, feed
+
+    def execute(self) -> CatalogueSyncResultDTO:
+        stores = list(Store.objects.all())
+        states = self._feed_states.get_states(stores)
+
+        products_created = 0
+        prices_saved = 0
+        stores_unchanged = 0
+        price_drop_product_ids = set()
+        future_to_store = {
+            http_client.submit(
+                self._fetch_for_store(store, states.get(store.id))
+            ): store
+            for store in stores
+        }
+
+        for future in as_completed(future_to_store):
+            store = future_to_store[future]
+            try:
+                store, feed = future.result()
+            except httpx.HTTPError:
+                logger.exception(f"Failed to fetch store {store.slug}")
+                continue
+
+            if feed is None:
+                continue
+
+            if not feed.modified:
+                try:
+                    self._price_sync.refresh_store(store)
+                except Exception:
+                    logger.exception(f"Failed to refresh prices for store {store.slug}")
+                    continue
+
+                self._feed_states.save_state(store, feed.state)
+                stores_unchanged += 1
+                continue
+
+            try:
+                created, result = self._sync_store(store, feed.products)
+            except Exception:
+                logger.exception(f"Failed to persist catalogue for store {store.slug}")
+                continue
+
+            products_created += created
+            prices_saved += result.prices_saved
+            price_drop_product_ids.update(result.price_drop_product_ids)
+
+            self._feed_states.save_state(store, feed.state)
+
+        return CatalogueSyncResultDTO(
+            products_created=products_created,
+            prices_saved=prices_saved,
+            stores_unchanged=stores_unchanged,
+            price_drop_product_ids=sorted(price_drop_product_ids),
+        )
+
+    def _sync_store(
+        self, store: Store, products: Iterable[ProductDTO]
+    ) -> tuple[int, PriceSyncResultDTO]:
+        observed_at = django_timezone.now()
+        products_created = 0
+        prices_saved = 0
+        price_drop_product_ids = set()
+
+        # The feed is parsed lazily and can only be read once, so every chunk
+        # goes through the importer before its prices are resolved. Parsing
+        # the next chunks runs in the background while this one is written.
+        chunks = iter_in_background(
+            batched(products, settings.STORE_FEED_CHUNK_SIZE),
+            maxsize=settings.STORE_FEED_QUEUE_SIZE,
+        )
+
+        for chunk in chunks:
+            products_created += self._importer.import_store(store, chunk)
+            result = self._price_sync.sync_store(
+                store, to_product_prices(chunk), observed_at
+            )
+            prices_saved += result.prices_saved
+            price_drop_product_ids.update(result.price_drop_product_ids)
+
+        return products_created, PriceSyncResultDTO(
+            prices_saved=prices_saved,
+            price_drop_product_ids=sorted(price_drop_product_ids),
+        )
 
 
 class PriceQueryService(IPriceQueryService):
-    def get_today_prices(self, product_id: int) -> list[StorePriceDTO]:
-        today_start = django_timezone.now().replace(
-            hour=0, minute=0, second=0, microsecond=0
+    HISTORY_FIELDS = (
+        "product_store__store__name",
+        "product_store__store__slug",
+        "price_cents",
+        "created_at",
+    )
+
+    # Snapshots only record price changes, so each store's series starts with
+    # the price in effect at ``start`` and every price is carried forward
+    # through the buckets until the next change, or until the store was last
+    # observed. ``count`` is the number of prices in effect within a bucket.
+    SNAPSHOT_BUCKETS_SQL = """
+        WITH snapshots AS (
+            SELECT
+                price_snapshots.id,
+                price_snapshots.product_store_id,
+                price_snapshots.created_at,
+                price_snapshots.price_cents
+            FROM price_snapshots
+            JOIN product_stores
+                ON product_stores.id = price_snapshots.product_store_id
+            JOIN stores ON stores.id = product_stores.store_id
+            WHERE product_stores.product_id = %(product_id)s
+                AND (%(store_slug)s::text IS NULL OR stores.slug = %(store_slug)s)
+                AND (
+                    %(end)s::timestamptz IS NULL
+                    OR price_snapshots.created_at < %(end)s
+                )
+        ),
+        points AS (
+            SELECT id, product_store_id, created_at, price_cents
+            FROM snapshots
+            WHERE %(start)s::timestamptz IS NULL OR created_at >= %(start)s
+            UNION ALL
+            (
+                SELECT DISTINCT ON (product_store_id)
+                    id,
+                    product_store_id,
+                    %(start)s::timestamptz,
+                    price_cents
+                FROM snapshots
+                WHERE created_at < %(start)s
+                ORDER BY product_store_id, created_at DESC, id DESC
+            )
+        ),
+        spans AS (
+            SELECT
+                id,
+                product_store_id,
+                created_at,
+                price_cents,
+                LEAD(created_at) OVER (
+                    PARTITION BY product_store_id ORDER BY created_at, id
+                ) AS ends_at
+            FROM points
+        ),
+        bucketed AS (
+            SELECT
+                spans.id,
+                spans.product_store_id,
+                spans.created_at,
+                spans.price_cents,
+                bucket_start
+            FROM spans
+            LEFT JOIN current_prices
+                ON current_prices.product_store_id = spans.product_store_id
+            CROSS JOIN LATERAL generate_series(
+                date_trunc(%(resolution)s, spans.created_at AT TIME ZONE 'UTC'),
+                date_trunc(
+                    %(resolution)s,
+                    LEAST(
+                        COALESCE(
+                            spans.ends_at - INTERVAL '1 microsecond',
+                            GREATEST(current_prices.observed_at, spans.created_at)
+                        ),
+                        %(end)s::timestamptz - INTERVAL '1 microsecond'
+                    ) AT TIME ZONE 'UTC'
+                ),
+                %(step)s::interval
+            ) AS bucket_start
         )
-        snapshots = (
-            PriceSnapshot.objects.filter(
-                product_store__product_id=product_id, created_at__gte=today_start
+        SELECT
+            stores.name,
+            stores.slug,
+            bucketed.bucket_start AT TIME ZONE 'UTC',
+            (
+                ARRAY_AGG(
+                    bucketed.price_cents ORDER BY bucketed.created_at, bucketed.id
+                )
+            )[1],
+            MIN(bucketed.price_cents),
+            MAX(bucketed.price_cents),
+            (
+                ARRAY_AGG(
+                    bucketed.price_cents
+                    ORDER BY bucketed.created_at DESC, bucketed.id DESC
+                )
+            )[1],
+            COUNT(*)
+        FROM bucketed
+        JOIN product_stores ON product_stores.id = bucketed.product_store_id
+        JOIN stores ON stores.id = product_stores.store_id
+        GROUP BY stores.name, stores.slug, bucketed.bucket_start
+        ORDER BY bucketed.bucket_start, stores.slug
+    """
+
+    # Day and week buckets come from the daily rollups, which count every
+    # observation. A bucket opens at the previous day's last price, or at the
+    # first snapshot of the day a store was first seen.
+    DAILY_BUCKETS_SQL = """
+        WITH days AS (
+            SELECT
+                daily_prices.product_store_id,
+                daily_prices.date,
+                daily_prices.min_price_cents,
+                daily_prices.max_price_cents,
+                daily_prices.last_price_cents,
+                daily_prices.count,
+                LAG(daily_prices.last_price_cents) OVER (
+                    PARTITION BY daily_prices.product_store_id
+                    ORDER BY daily_prices.date
+                ) AS previous_price_cents
+            FROM daily_prices
+            JOIN product_stores
+                ON product_stores.id = daily_prices.product_store_id
+            JOIN stores ON stores.id = product_stores.store_id
+            WHERE product_stores.product_id = %(product_id)s
+                AND (%(store_slug)s::text IS NULL OR stores.slug = %(store_slug)s)
+                AND (%(end_date)s::date IS NULL OR daily_prices.date <= %(end_date)s)
+        )
+        SELECT
+            stores.name,
+            stores.slug,
+            date_trunc(%(resolution)s, days.date::timestamp) AT TIME ZONE 'UTC'
+                AS bucket_start,
+            (
+                ARRAY_AGG(
+                    COALESCE(
+                        days.previous_price_cents,
+                        (
+                            SELECT price_snapshots.price_cents
+                            FROM price_snapshots
+                            WHERE price_snapshots.product_store_id
+                                    = days.product_store_id
+                                AND price_snapshots.created_at
+                                    >= days.date::timestamp AT TIME ZONE 'UTC'
+                            ORDER BY price_snapshots.created_at, price_snapshots.id
+                            LIMIT 1
+                        ),
+                        days.last_price_cents
+                    )
+                    ORDER BY days.date
+                )
+            )[1],
+            MIN(days.min_price_cents),
+            MAX(days.max_price_cents),
+            (ARRAY_AGG(days.last_price_cents ORDER BY days.date DESC))[1],
+            SUM(days.count)
+        FROM days
+        JOIN product_stores ON product_stores.id = days.product_store_id
+        JOIN stores ON stores.id = product_stores.store_id
+        WHERE %(start_date)s::date IS NULL OR days.date >= %(start_date)s
+        GROUP BY stores.name, stores.slug, bucket_start
+        ORDER BY bucket_start, stores.slug
+    """
+
+    def get_today_prices(self, product_id: int) -> list[StorePriceDTO]:
+        current_prices = (
+            CurrentPrice.objects.filter(
+                product_store__product_id=product_id,
+                observed_at__gte=get_today_start(),
             )
             .select_related("product_store__store")
-            .order_by("product_store__store__slug", "-created_at")
-            .distinct("product_store__store__slug")
+            .order_by("product_store__store__slug")
         )
 
         return [
             StorePriceDTO(
-                store_name=snapshot.product_store.store.name,
-                store_slug=snapshot.product_store.store.slug,
-                price_cents=snapshot.price_cents,
+                store_name=current_price.product_store.store.name,
+                store_slug=current_price.product_store.store.slug,
+                price_cents=current_price.price_cents,
             )
-            for snapshot in snapshots
+            for current_price in current_prices
         ]
 
     def get_price_range_today(self, product_id: int) -> PriceRangeDTO:
@@ -163,21 +978,73 @@ class PriceQueryService(IPriceQueryService):
         return PriceRangeDTO(min_price_cents=min(values), max_price_cents=max(values))
 
     def get_average_last_30_days(self, product_id: int) -> int | None:
-        cutoff = django_timezone.now() - timedelta(days=30)
+        cutoff = django_timezone.now().date() - timedelta(days=30)
 
-        avg_price = PriceSnapshot.objects.filter(
+        totals = DailyPrice.objects.filter(
             product_store__product_id=product_id,
-            created_at__gte=cutoff,
-        ).aggregate(avg_price=Avg("price_cents", output_field=models.IntegerField()))[
-            "avg_price"
-        ]
+            date__gte=cutoff,
+        ).aggregate(sum_price=Sum("sum_price_cents"), count=Sum("count"))
+
+        if not totals["count"]:
+            return None
 
-        return avg_price
+        return round(totals["sum_price"] / totals["count"])
 
     def get_trend(self, product_id: int) -> TrendChoices:
         price_range = self.get_price_range_today(product_id)
         avg_30 = self.get_average_last_30_days(product_id)
 
+        return self._calculate_trend(price_range, avg_30)
+
+    def get_summaries(self, product_ids: list[int]) -> dict[int, PriceSummaryDTO]:
+        if not product_ids:
+            return {}
+
+        cutoff = django_timezone.now().date() - timedelta(days=30)
+
+        today_ranges = {
+            product_id: PriceRangeDTO(
+                min_price_cents=min_price, max_price_cents=max_price
+            )
+            for product_id, min_price, max_price in CurrentPrice.objects.filter(
+                product_store__product_id__in=product_ids,
+                observed_at__gte=get_today_start(),
+            )
+            .values("product_store__product_id")
+            .annotate(min_price=Min("price_cents"), max_price=Max("price_cents"))
+            .values_list("product_store__product_id", "min_price", "max_price")
+        }
+
+        averages = {
+            product_id: round(sum_price / count)
+            for product_id, sum_price, count in DailyPrice.objects.filter(
+                product_store__product_id__in=product_ids,
+                date__gte=cutoff,
+            )
+            .values("product_store__product_id")
+            .annotate(sum_price=Sum("sum_price_cents"), count=Sum("count"))
+            .values_list("product_store__product_id", "sum_price", "count")
+        }
+
+        summaries = {}
+        for product_id in product_ids:
+            price_range = today_ranges.get(
+                product_id, PriceRangeDTO(min_price_cents=None, max_price_cents=None)
+            )
+            avg_30 = averages.get(product_id)
+
+            summaries[product_id] = PriceSummaryDTO(
+                min_price_cents=price_range.min_price_cents,
+                max_price_cents=price_range.max_price_cents,
+                average_30_days_cents=avg_30,
+                trend=self._calculate_trend(price_range, avg_30),
+            )
+
+        return summaries
+
+    def _calculate_trend(
+        self, price_range: PriceRangeDTO, avg_30: int | None
+    ) -> TrendChoices:
         if not avg_30 or price_range.min_price_cents is None:
             return TrendChoices.UNKNOWN
 
@@ -191,21 +1058,217 @@ class PriceQueryService(IPriceQueryService):
 
         return TrendChoices.STABLE
 
-    def get_history(self, product_id: int) -> list[StorePriceHistoryDTO]:
-        snapshots = PriceSnapshot.objects.filter(
-            product_store__product_id=product_id
-        ).select_related(
-            "product_store__store"
-        ).order_by(
-            "created_at"
+    def get_history(
+        self, product_id: int, filters: PriceHistoryFilterDTO | None = None
+    ) -> list[StorePriceHistoryDTO]:
+        filters = filters or PriceHistoryFilterDTO()
+        snapshots = (
+            self._filter_history(product_id, filters)
+            .order_by("created_at")
+            .values_list(*self.HISTORY_FIELDS)
         )
+        seeds = [row for _, *row in self._get_history_seeds(product_id, filters)]
 
-        return [
-            StorePriceHistoryDTO(
-                store_name=snapshot.product_store.store.name,
-                store_slug=snapshot.product_store.store.slug,
-                price_cents=snapshot.price_cents,
-                created_at=snapshot.created_at,
+        return [self._to_history_dto(*row) for row in chain(seeds, snapshots)]
+
+    def get_history_page(
+        self,
+        product_id: int,
+        filters: PriceHistoryFilterDTO,
+        cursor: str | None,
+        limit: int,
+    ) -> PriceHistoryPageDTO:
+        snapshots = self._filter_history(product_id, filters)
+        seeds = self._get_history_seeds(product_id, filters)
+
+        if cursor:
+            created_at, snapshot_id = self._decode_cursor(cursor)
+            snapshots = snapshots.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, id__gt=snapshot_id)
             )
-            for snapshot in snapshots
+            seeds = [
+                seed
+                for seed in seeds
+                if (seed[-1], seed[0]) > (created_at, snapshot_id)
+            ]
+
+        rows = list(
+            snapshots.order_by("created_at", "id").values_list(
+                "id", *self.HISTORY_FIELDS
+            )[: limit + 1]
+        )
+        rows = list(merge(seeds, rows, key=lambda row: (row[-1], row[0])))[: limit + 1]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_id, *_, last_created_at = rows[-1]
+            next_cursor = self._encode_cursor(last_created_at, last_id)
+
+        return PriceHistoryPageDTO(
+            items=[self._to_history_dto(*row) for _, *row in rows],
+            next_cursor=next_cursor,
+        )
+
+    def iter_history(
+        self, product_id: int, filters: PriceHistoryFilterDTO, chunk_size: int
+    ) -> Iterator[StorePriceHistoryDTO]:
+        snapshots = (
+            self._filter_history(product_id, filters)
+            .order_by("created_at", "id")
+            .values_list(*self.HISTORY_FIELDS)
+        )
+
+        for _, *row in self._get_history_seeds(product_id, filters):
+            yield self._to_history_dto(*row)
+
+        for row in snapshots.iterator(chunk_size=chunk_size):
+            yield self._to_history_dto(*row)
+
+    def get_history_bucketed(
+        self,
+        product_id: int,
+        bucket: ResolutionChoices,
+        filters: PriceHistoryFilterDTO | None = None,
+    ) -> list[PriceBucketDTO]:
+        filters = filters or PriceHistoryFilterDTO()
+
+        with connection.cursor() as cursor:
+            if bucket == ResolutionChoices.HOUR:
+                cursor.execute(
+                    self.SNAPSHOT_BUCKETS_SQL,
+                    {
+                        "product_id": product_id,
+                        "store_slug": filters.store_slug,
+                        "start": filters.start,
+                        "end": filters.end,
+                        "resolution": bucket.value,
+                        "step": f"1 {bucket.value}",
+                    },
+                )
+            else:
+                cursor.execute(
+                    self.DAILY_BUCKETS_SQL,
+                    {
+                        "product_id": product_id,
+                        "store_slug": filters.store_slug,
+                        "start_date": self._get_start_date(filters),
+                        "end_date": self._get_end_date(filters),
+                        "resolution": bucket.value,
+                    },
+                )
+
+            rows = cursor.fetchall()
+
+        return [PriceBucketDTO(*row) for row in rows]
+
+    def _filter_history(
+        self, product_id: int, filters: PriceHistoryFilterDTO
+    ) -> QuerySet[PriceSnapshot]:
+        snapshots = PriceSnapshot.objects.filter(product_store__product_id=product_id)
+
+        if filters.store_slug:
+            snapshots = snapshots.filter(product_store__store__slug=filters.store_slug)
+
+        if filters.start:
+            snapshots = snapshots.filter(created_at__gte=filters.start)
+
+        if filters.end:
+            snapshots = snapshots.filter(created_at__lt=filters.end)
+
+        return snapshots
+
+    def _get_history_seeds(
+        self, product_id: int, filters: PriceHistoryFilterDTO
+    ) -> list[tuple]:
+        """
+        Returns the price each store had at ``filters.start`` as history rows
+        dated at the start, since unchanged prices have no snapshots within
+        the window. Rows are ``(snapshot id, *HISTORY_FIELDS)``, ordered by id.
+        """
+        if not filters.start or (filters.end and filters.end <= filters.start):
+            return []
+
+        seeds = (
+            self._filter_history(product_id, replace(filters, start=None, end=None))
+            .filter(created_at__lt=filters.start)
+            .order_by("product_store_id", "-created_at", "-id")
+            .distinct("product_store_id")
+            .values_list("id", *self.HISTORY_FIELDS)
+        )
+
+        return sorted(
+            (snapshot_id, store_name, store_slug, price_cents, filters.start)
+            for snapshot_id, store_name, store_slug, price_cents, _ in seeds
+        )
+
+    def _get_start_date(self, filters: PriceHistoryFilterDTO) -> date | None:
+        if not filters.start:
+            return None
+
+        return filters.start.astimezone(UTC).date()
+
+    def _get_end_date(self, filters: PriceHistoryFilterDTO) -> date | None:
+        if not filters.end:
+            return None
+
+        last_moment = filters.end - timedelta(microseconds=1)
+
+        return last_moment.astimezone(UTC).date()
+
+    def _to_history_dto(
+        self,
+        store_name: str,
+        store_slug: str,
+        price_cents: int,
+        created_at: datetime,
+    ) -> StorePriceHistoryDTO:
+        return StorePriceHistoryDTO(
+            store_name=store_name,
+            store_slug=store_slug,
+            price_cents=price_cents,
+            created_at=created_at,
+        )
+
+    def _encode_cursor(self, created_at: datetime, snapshot_id: int) -> str:
+        value = f"{created_at.isoformat()}|{snapshot_id}"
+
+        return urlsafe_b64encode(value.encode()).decode()
+
+    def _decode_cursor(self, cursor: str) -> tuple[datetime, int]:
+        try:
+            created_at, snapshot_id = urlsafe_b64decode(cursor).decode().split("|")
+
+            return datetime.fromisoformat(created_at), int(snapshot_id)
+        except ValueError as error:
+            raise InvalidCursorError(f"Invalid cursor: {cursor}") from error
+
+    def get_daily_averages(
+        self, product_id: int, filters: PriceHistoryFilterDTO | None = None
+    ) -> list[DailyAveragePriceDTO]:
+        filters = filters or PriceHistoryFilterDTO()
+        daily_prices = DailyPrice.objects.filter(product_store__product_id=product_id)
+
+        if filters.store_slug:
+            daily_prices = daily_prices.filter(
+                product_store__store__slug=filters.store_slug
+            )
+
+        if filters.start:
+            daily_prices = daily_prices.filter(date__gte=self._get_start_date(filters))
+
+        if filters.end:
+            daily_prices = daily_prices.filter(date__lte=self._get_end_date(filters))
+
+        daily_totals = (
+            daily_prices.values("date")
+            .annotate(sum_price=Sum("sum_price_cents"), count=Sum("count"))
+            .order_by("date")
+            .values_list("date", "sum_price", "count")
+        )
+
+        return [
+            DailyAveragePriceDTO(date=day, price_cents=round(sum_price / count))
+            for day, sum_price, count in daily_totals
         ]
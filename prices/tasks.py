@@ -1,4 +1,7 @@
+from dataclasses import asdict
+
 from celery import shared_task, signature
+from django.conf import settings
 
 
 @shared_task
@@ -7,6 +10,41 @@ def sync_all_store_prices():
 
     result = PriceSyncService().execute()
 
-    signature("alerts.tasks.check_price_alerts").apply_async()
+    if result.price_drop_product_ids:
+        signature(
+            "alerts.tasks.check_price_alerts_for_products",
+            args=[result.price_drop_product_ids],
+        ).apply_async()
+
+    return asdict(result)
+
+
+@shared_task
+def sync_catalogue():
+    from prices.services import CatalogueSyncService
+
+    result = CatalogueSyncService().execute()
+
+    if result.price_drop_product_ids:
+        signature(
+            "alerts.tasks.check_price_alerts_for_products",
+            args=[result.price_drop_product_ids],
+        ).apply_async()
+
+    return asdict(result)
+
+
+@shared_task
+def maintain_price_partitions():
+    from prices.services import PricePartitionService
+
+    service = PricePartitionService()
+    created = service.ensure_partitions(settings.PRICE_SNAPSHOT_PARTITIONS_AHEAD)
+    dropped = []
+
+    if settings.PRICE_SNAPSHOT_RETENTION_MONTHS:
+        dropped = service.drop_expired_partitions(
+            settings.PRICE_SNAPSHOT_RETENTION_MONTHS
+        )
 
-    return result
+    return {"created": created, "dropped": dropped}
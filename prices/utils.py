@@ -1,5 +1,8 @@
+from datetime import date, datetime
 from decimal import Decimal
 
+from django.utils import timezone
+
 
 def usd_to_cents(amount: Decimal) -> int:
     return int(amount * 100)
@@ -7,3 +10,13 @@ def usd_to_cents(amount: Decimal) -> int:
 
 def cents_to_usd(amount: int) -> Decimal:
     return Decimal(amount) / 100
+
+
+def add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+
+    return day.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def get_today_start() -> datetime:
+    return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
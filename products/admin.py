@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from products.models import Product, ProductStore, Store
+from products.models import Product, ProductStore, Store, StoreFeedState
 
 
 @admin.register(Store)
@@ -18,3 +18,8 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "created_at")
     search_fields = ("name",)
     inlines = [ProductStoreInline]
+
+
+@admin.register(StoreFeedState)
+class StoreFeedStateAdmin(admin.ModelAdmin):
+    list_display = ("store", "etag", "last_modified", "updated_at")
@@ -1,4 +1,6 @@
+from collections.abc import Iterable
 from dataclasses import dataclass
+from decimal import Decimal
 
 
 @dataclass(frozen=True)
@@ -6,3 +8,18 @@ class ProductDTO:
     id: int
     name: str
     description: str
+    price: Decimal
+
+
+@dataclass(frozen=True)
+class FeedStateDTO:
+    etag: str = ""
+    last_modified: str = ""
+    content_hash: str = ""
+
+
+@dataclass(frozen=True)
+class StoreFeedDTO:
+    products: Iterable[ProductDTO]
+    state: FeedStateDTO
+    modified: bool = True
@@ -1,11 +1,33 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 
-from products.dtos import ProductDTO
+from products.dtos import FeedStateDTO, ProductDTO, StoreFeedDTO
+from products.models import Store
 
 
 class IStoreFetcher(ABC):
     @abstractmethod
-    def fetch(self) -> list[ProductDTO]:
+    async def fetch(self, state: FeedStateDTO | None = None) -> StoreFeedDTO:
+        pass
+
+
+class IStoreFeedStateService(ABC):
+    @abstractmethod
+    def get_states(self, stores: list[Store]) -> dict[int, FeedStateDTO]:
+        pass
+
+    @abstractmethod
+    def save_state(self, store: Store, state: FeedStateDTO) -> None:
+        pass
+
+
+class IProductStoreIdCache(ABC):
+    @abstractmethod
+    def get_many(self, store_id: int, external_ids: Iterable[int]) -> dict[int, int]:
+        pass
+
+    @abstractmethod
+    def set_many(self, store_id: int, product_store_ids: dict[int, int]) -> None:
         pass
 
 
@@ -13,3 +35,7 @@ class IProductImporter(ABC):
     @abstractmethod
     def execute(self) -> int:
         pass
+
+    @abstractmethod
+    def import_store(self, store: Store, products: Iterable[ProductDTO]) -> int:
+        pass
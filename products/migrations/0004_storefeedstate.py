@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_productstore_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreFeedState',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_state', serialize=False, to='products.store')),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+            ],
+            options={
+                'db_table': 'store_feed_states',
+            },
+        ),
+    ]
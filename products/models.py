@@ -55,3 +55,21 @@ class ProductStore(BaseTimestampedModel):
 
     def __str__(self):
         return f"{self.product.name} - {self.store.name}"
+
+
+class StoreFeedState(BaseTimestampedModel):
+    store = models.OneToOneField(
+        Store,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="feed_state",
+    )
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        db_table = "store_feed_states"
+
+    def __str__(self):
+        return f"{self.store.name} feed state"
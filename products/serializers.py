@@ -50,3 +50,19 @@ class PriceAverageHistorySerializer(serializers.Serializer):
 class PriceHistorySerializer(serializers.Serializer):
     history = PriceHistoryStoreSerializer(many=True)
     average_history = PriceAverageHistorySerializer(many=True)
+
+
+class PriceHistoryPageSerializer(serializers.Serializer):
+    results = PriceHistoryStoreSerializer(many=True)
+    next = serializers.CharField(allow_null=True)
+
+
+class PriceHistoryBucketSerializer(serializers.Serializer):
+    store = serializers.CharField()
+    store_slug = serializers.CharField()
+    bucket_start = serializers.DateTimeField()
+    open = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    min = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    max = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    close = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    count = serializers.IntegerField()
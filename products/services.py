@@ -1,156 +1,314 @@
+import hashlib
+import io
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import as_completed
+from decimal import Decimal
+from itertools import batched
+from typing import IO
 
 import httpx
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Q
-
-from products.dtos import ProductDTO
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone as django_timezone
+
+from base.db import copy_rows
+from base.http import http_client
+from base.jsonstream import iter_json_array
+from products.dtos import FeedStateDTO, ProductDTO, StoreFeedDTO
 from products.errors import FetcherNotFoundError
-from products.interfaces import IProductImporter, IStoreFetcher
-from products.models import Product, ProductStore, Store
+from products.interfaces import (
+    IProductImporter,
+    IProductStoreIdCache,
+    IStoreFeedStateService,
+    IStoreFetcher,
+)
+from products.models import ProductStore, Store, StoreFeedState
 
 logger = logging.getLogger(__name__)
 
 
-class DummyJsonProductFetcher(IStoreFetcher):
-    TIMEOUT = 10
+class ConditionalStoreFetcher(IStoreFetcher):
+    """
+    Sends ETag / Last-Modified validators from the previous fetch and falls
+    back to comparing a hash of the body when the store ignores them.
+
+    The body is spooled to a temporary file and products are parsed lazily
+    from it, so large feeds are never held in memory as a whole.
+    """
+
+    store_slug: str
+    params: dict | None = None
+    items_key: str | None = None
+
+    async def fetch(self, state: FeedStateDTO | None = None) -> StoreFeedDTO:
+        headers = {}
+
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.STORE_FEED_SPOOL_MAX_SIZE
+        )
+
+        digest = hashlib.sha256()
+
+        try:
+            response = await http_client.download(
+                settings.STORE_APIS[self.store_slug],
+                body,
+                digest,
+                params=self.params,
+                headers=headers,
+            )
+
+            if response.status_code == httpx.codes.NOT_MODIFIED and state is not None:
+                body.close()
+                return StoreFeedDTO(products=[], state=state, modified=False)
 
-    def fetch(self) -> list[ProductDTO]:
-        with httpx.Client(timeout=self.TIMEOUT) as client:
-            response = client.get(settings.STORE_APIS["dummyjson"], params={"limit": 0})
             response.raise_for_status()
-            data = response.json()
 
-        return [
-            ProductDTO(
-                id=item["id"],
-                name=item["title"],
-                description=item.get("description", ""),
+            new_state = FeedStateDTO(
+                etag=response.headers.get("ETag", ""),
+                last_modified=response.headers.get("Last-Modified", ""),
+                content_hash=digest.hexdigest(),
             )
-            for item in data.get("products", [])
-        ]
+        except BaseException:
+            body.close()
+            raise
 
+        if state is not None and state.content_hash == new_state.content_hash:
+            body.close()
+            return StoreFeedDTO(products=[], state=new_state, modified=False)
 
-class FakeStoreProductFetcher(IStoreFetcher):
-    TIMEOUT = 10
+        return StoreFeedDTO(products=self._iter_products(body), state=new_state)
 
-    def fetch(self) -> list[ProductDTO]:
-        with httpx.Client(timeout=self.TIMEOUT) as client:
-            response = client.get(settings.STORE_APIS["fakestore"])
-            response.raise_for_status()
+    def _iter_products(self, body: IO[bytes]) -> Iterator[ProductDTO]:
+        body.seek(0)
 
-            data = response.json()
+        with io.TextIOWrapper(body, encoding="utf-8") as stream:
+            for item in iter_json_array(stream, key=self.items_key):
+                yield self._to_product(item)
+
+    def _to_product(self, item: dict) -> ProductDTO:
+        return ProductDTO(
+            id=item["id"],
+            name=item["title"],
+            description=item.get("description", ""),
+            price=Decimal(str(item["price"])),
+        )
 
-        return [
-            ProductDTO(
-                id=item["id"],
-                name=item["title"],
-                description=item.get("description", ""),
-            )
-            for item in data
-        ]
 
+class DummyJsonProductFetcher(ConditionalStoreFetcher):
+    store_slug = "dummyjson"
+    params = {"limit": 0}
+    items_key = "products"
 
-_PRODUCT_FETCHERS: dict[str, IStoreFetcher] = {
+
+class FakeStoreProductFetcher(ConditionalStoreFetcher):
+    store_slug = "fakestore"
+
+
+PRODUCT_FETCHERS: dict[str, IStoreFetcher] = {
     "dummyjson": DummyJsonProductFetcher(),
     "fakestore": FakeStoreProductFetcher(),
 }
 
 
-class ProductImportService(IProductImporter):
-    CONCURRENCY = 10
+class ProductStoreIdCache(IProductStoreIdCache):
+    """
+    Maps a store's external product ids to ``ProductStore`` ids through the
+    Django cache, so known items resolve without touching the database.
+    """
+
+    KEY_PREFIX = "product-store-id"
 
-    def __init__(self, fetchers: dict[str, IStoreFetcher] | None = None):
-        self._fetchers = fetchers or _PRODUCT_FETCHERS
+    def __init__(self, timeout: int | None = None):
+        self._timeout = timeout or settings.PRODUCT_STORE_ID_CACHE_TTL
 
-    def _fetch_for_store(self, store: Store) -> tuple[Store, list[ProductDTO]]:
+    def get_many(self, store_id: int, external_ids: Iterable[int]) -> dict[int, int]:
+        keys = {
+            self._get_key(store_id, external_id): external_id
+            for external_id in external_ids
+        }
+        product_store_ids = {
+            keys[key]: product_store_id
+            for key, product_store_id in cache.get_many(keys).items()
+        }
+
+        missing_ids = set(keys.values()) - product_store_ids.keys()
+
+        if missing_ids:
+            loaded_ids = dict(
+                ProductStore.objects.filter(
+                    store_id=store_id, external_id__in=missing_ids
+                ).values_list("external_id", "id")
+            )
+            self.set_many(store_id, loaded_ids)
+            product_store_ids.update(loaded_ids)
+
+        return product_store_ids
+
+    def set_many(self, store_id: int, product_store_ids: dict[int, int]) -> None:
+        cache.set_many(
+            {
+                self._get_key(store_id, external_id): product_store_id
+                for external_id, product_store_id in product_store_ids.items()
+            },
+            timeout=self._timeout,
+        )
+
+    def _get_key(self, store_id: int, external_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{store_id}:{external_id}"
+
+
+class ProductImportService(IProductImporter):
+    STAGE_TABLE = "product_import_stage"
+
+    CREATE_STAGE_SQL = f"""
+        CREATE TEMPORARY TABLE {STAGE_TABLE} (
+            name varchar(255) NOT NULL,
+            description text NOT NULL,
+            external_id bigint NOT NULL
+        ) ON COMMIT DROP
+    """
+
+    # Upserts staged products and links them to the store in one statement.
+    # Descriptions are refreshed when they changed, and the ids of newly
+    # linked product stores are returned for the id cache.
+    UPSERT_SQL = f"""
+        WITH upserted AS (
+            INSERT INTO products (name, description, created_at, updated_at)
+            SELECT name, description, %(now)s, %(now)s FROM {STAGE_TABLE}
+            ON CONFLICT (name) DO UPDATE
+                SET description = EXCLUDED.description,
+                    updated_at = EXCLUDED.updated_at
+                WHERE EXCLUDED.description <> ''
+                    AND products.description <> EXCLUDED.description
+            RETURNING id, name
+        ),
+        staged_products AS (
+            SELECT id, name FROM upserted
+            UNION
+            SELECT products.id, products.name
+            FROM products JOIN {STAGE_TABLE} USING (name)
+        )
+        INSERT INTO product_stores (
+            product_id, store_id, external_id, created_at, updated_at
+        )
+        SELECT staged_products.id, %(store_id)s, stage.external_id, %(now)s, %(now)s
+        FROM staged_products JOIN {STAGE_TABLE} AS stage USING (name)
+        ON CONFLICT (product_id, store_id) DO NOTHING
+        RETURNING id, external_id
+    """
+
+    def __init__(
+        self,
+        fetchers: dict[str, IStoreFetcher] | None = None,
+        product_store_ids: IProductStoreIdCache | None = None,
+    ):
+        self._fetchers = fetchers or PRODUCT_FETCHERS
+        self._product_store_ids = product_store_ids or ProductStoreIdCache()
+
+    async def _fetch_for_store(
+        self, store: Store
+    ) -> tuple[Store, Iterable[ProductDTO]]:
         fetcher = self._fetchers.get(store.slug)
 
         if not fetcher:
             raise FetcherNotFoundError(f"Fetcher for {store.slug} is not implemented")
 
-        items = fetcher.fetch()
+        feed = await fetcher.fetch()
 
-        return store, items
+        return store, feed.products
 
     def execute(self) -> int:
         stores = Store.objects.all().only("id", "slug")
 
         products_created = 0
 
-        with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
-            future_to_store = {
-                executor.submit(self._fetch_for_store, store): store for store in stores
-            }
+        future_to_store = {
+            http_client.submit(self._fetch_for_store(store)): store for store in stores
+        }
 
-            for future in as_completed(future_to_store):
-                store = future_to_store[future]
-                try:
-                    store_id, products = future.result()
-                except httpx.HTTPError:
-                    logger.exception(f"Failed to fetch store {store.slug}")
+        for future in as_completed(future_to_store):
+            store = future_to_store[future]
+            try:
+                store, products = future.result()
+            except httpx.HTTPError:
+                logger.exception(f"Failed to fetch store {store.slug}")
 
-                    continue
+                continue
 
-                try:
-                    products_created += self._store_products(store, products)
-                except Exception:
-                    logger.exception(
-                        f"Failed to persist products for store {store.slug}"
-                    )
-                    continue
+            try:
+                products_created += self.import_store(store, products)
+            except Exception:
+                logger.exception(f"Failed to persist products for store {store.slug}")
+                continue
 
         return products_created
 
-    def _store_products(self, store: Store, products: list[ProductDTO]) -> int:
-        if not products:
-            return 0
+    def import_store(self, store: Store, products: Iterable[ProductDTO]) -> int:
+        return sum(
+            self._store_products(store, chunk)
+            for chunk in batched(products, settings.STORE_FEED_CHUNK_SIZE)
+        )
 
+    def _store_products(self, store: Store, products: Sequence[ProductDTO]) -> int:
         products_by_name = {product.name.strip(): product for product in products}
-        names = set(products_by_name.keys())
 
         if not products_by_name:
             return 0
 
-        existing_names = set(
-            Product.objects.filter(name__in=names).values_list("name", flat=True)
+        now = django_timezone.now()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(self.CREATE_STAGE_SQL)
+            copy_rows(
+                self.STAGE_TABLE,
+                ("name", "description", "external_id"),
+                (
+                    (name, product.description, product.id)
+                    for name, product in products_by_name.items()
+                ),
+            )
+            cursor.execute(self.UPSERT_SQL, {"store_id": store.id, "now": now})
+            added_stores = cursor.fetchall()
+            cursor.execute(f"DROP TABLE {self.STAGE_TABLE}")
+
+        self._product_store_ids.set_many(
+            store.id,
+            {
+                external_id: product_store_id
+                for product_store_id, external_id in added_stores
+            },
         )
 
-        to_create = [
-            Product(name=name, description=products_by_name[name].description)
-            for name in names
-            if name not in existing_names
-        ]
-
-        with transaction.atomic():
-            if to_create:
-                Product.objects.bulk_create(
-                    to_create,
-                    ignore_conflicts=True,
-                    batch_size=1000,
-                )
-
-            products_without_store = Product.objects.filter(
-                ~Q(stores=store),
-                name__in=names,
-            ).values_list(
-                "id",
-                "name",
-            )
+        return len(added_stores)
 
-            added_stores = ProductStore.objects.bulk_create(
-                [
-                    ProductStore(
-                        product_id=product_id,
-                        store=store,
-                        external_id=products_by_name[product_name].id,
-                    )
-                    for product_id, product_name in products_without_store
-                ],
-                ignore_conflicts=True,
-                batch_size=1000,
-            )
 
-        return len(added_stores)
+class StoreFeedStateService(IStoreFeedStateService):
+    def get_states(self, stores: list[Store]) -> dict[int, FeedStateDTO]:
+        return {
+            feed_state.store_id: FeedStateDTO(
+                etag=feed_state.etag,
+                last_modified=feed_state.last_modified,
+                content_hash=feed_state.content_hash,
+            )
+            for feed_state in StoreFeedState.objects.filter(store__in=stores)
+        }
+
+    def save_state(self, store: Store, state: FeedStateDTO) -> None:
+        StoreFeedState.objects.update_or_create(
+            store=store,
+            defaults={
+                "etag": state.etag,
+                "last_modified": state.last_modified,
+                "content_hash": state.content_hash,
+            },
+        )
@@ -1,20 +1,33 @@
-from collections import defaultdict
+import json
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
+from itertools import batched
 
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_extra.viewsets import GenericViewSet
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from currencies.interfaces import ICurrencyConversionService
 from currencies.services import CurrencyConversionService
-from prices.choices import TrendChoices
+from prices.choices import ResolutionChoices, TrendChoices
+from prices.dtos import PriceHistoryFilterDTO, StorePriceHistoryDTO
+from prices.errors import InvalidCursorError
 from prices.interfaces import IPriceQueryService
 from prices.services import PriceQueryService
 from products.models import Product
 from products.serializers import (
+    PriceHistoryBucketSerializer,
+    PriceHistoryPageSerializer,
     PriceHistorySerializer,
+    PriceHistoryStoreSerializer,
     ProductDetailSerializer,
     ProductListSerializer,
     StorePriceSerializer,
@@ -34,6 +47,10 @@ class ProductViewSet(GenericViewSet):
     filter_backends = [SearchFilter]
     search_fields = ["name"]
 
+    HISTORY_PAGE_SIZE = 500
+    MAX_HISTORY_PAGE_SIZE = 5000
+    HISTORY_STREAM_CHUNK_SIZE = 2000
+
     def __init__(
         self,
         price_query: IPriceQueryService | None = None,
@@ -52,36 +69,135 @@ class ProductViewSet(GenericViewSet):
     def _get_ordering(self, request: Request) -> str:
         return request.query_params.get("ordering", "price").lower()
 
+    def _get_history_filters(self, request: Request) -> PriceHistoryFilterDTO:
+        return PriceHistoryFilterDTO(
+            store_slug=request.query_params.get("store"),
+            start=self._parse_moment(request.query_params.get("from"), "from"),
+            end=self._parse_moment(request.query_params.get("to"), "to", is_end=True),
+        )
+
+    def _parse_moment(
+        self, value: str | None, param: str, is_end: bool = False
+    ) -> datetime | None:
+        if not value:
+            return None
+
+        try:
+            moment = parse_datetime(value)
+
+            if moment is None:
+                day = parse_date(value)
+
+                if day is None:
+                    raise ValueError(value)
+
+                moment = datetime.combine(day, time.min)
+                if is_end:
+                    moment += timedelta(days=1)
+        except ValueError:
+            raise ValidationError({param: "Enter a valid date or datetime."})
+
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+        return moment
+
+    def _get_page_size(self, request: Request) -> int:
+        page_size = request.query_params.get("page_size", self.HISTORY_PAGE_SIZE)
+
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise ValidationError({"page_size": "Enter a valid integer."})
+
+        return max(1, min(page_size, self.MAX_HISTORY_PAGE_SIZE))
+
     def _convert(self, amount: int | None, currency: str) -> Decimal | None:
         if amount is None:
             return None
 
         return self._conversion.convert(amount, currency)
 
+    def _convert_many(
+        self,
+        amounts: list[int | None],
+        currency: str,
+        dates: list[date] | None = None,
+    ) -> list[Decimal | None]:
+        """
+        Converts with today's rate, or with the rate of each amount's date
+        when ``dates`` is given.
+        """
+        present_amounts = [amount for amount in amounts if amount is not None]
+
+        if dates is None:
+            converted = self._conversion.convert_many(present_amounts, currency)
+        else:
+            converted = self._conversion.convert_many_at_dates(
+                present_amounts,
+                [
+                    rate_date
+                    for amount, rate_date in zip(amounts, dates)
+                    if amount is not None
+                ],
+                currency,
+            )
+
+        converted = iter(converted)
+
+        return [None if amount is None else next(converted) for amount in amounts]
+
+    def _build_history(
+        self, history_prices: Sequence[StorePriceHistoryDTO], currency: str
+    ) -> list[dict]:
+        converted_prices = self._convert_many(
+            [price.price_cents for price in history_prices],
+            currency,
+            [price.created_at.date() for price in history_prices],
+        )
+
+        return [
+            {
+                "store": price.store_name,
+                "store_slug": price.store_slug,
+                "price": converted_price,
+                "created_at": price.created_at,
+            }
+            for price, converted_price in zip(history_prices, converted_prices)
+        ]
+
     def list(self, request: Request, *args, **kwargs) -> Response:
         queryset = self.filter_queryset(self.get_queryset())
 
         currency_filter = self._get_currency(request)
         ordering_filter = self._get_ordering(request)
 
-        products_data = []
-        for product in queryset:
-            price_range = self._price_query.get_price_range_today(product.id)
-            trend = self._price_query.get_trend(product.id)
-
-            price_min = self._convert(price_range.min_price_cents, currency_filter)
-            price_max = self._convert(price_range.max_price_cents, currency_filter)
-
-            products_data.append(
-                {
-                    "id": product.id,
-                    "name": product.name,
-                    "price_min": price_min,
-                    "price_max": price_max,
-                    "trend": trend,
-                    "currency": currency_filter,
-                }
+        products = list(queryset.only("id", "name"))
+        summaries_by_product = self._price_query.get_summaries(
+            [product.id for product in products]
+        )
+
+        summaries = [summaries_by_product[product.id] for product in products]
+        prices_min = self._convert_many(
+            [summary.min_price_cents for summary in summaries], currency_filter
+        )
+        prices_max = self._convert_many(
+            [summary.max_price_cents for summary in summaries], currency_filter
+        )
+
+        products_data = [
+            {
+                "id": product.id,
+                "name": product.name,
+                "price_min": price_min,
+                "price_max": price_max,
+                "trend": summary.trend,
+                "currency": currency_filter,
+            }
+            for product, summary, price_min, price_max in zip(
+                products, summaries, prices_min, prices_max
             )
+        ]
 
         if ordering_filter in ("price", "-price"):
             reverse = ordering_filter.startswith("-")
@@ -128,14 +244,17 @@ class ProductViewSet(GenericViewSet):
         product = self.get_object()
         currency = self._get_currency(request)
         store_prices = self._price_query.get_today_prices(product.id)
+        converted_prices = self._convert_many(
+            [price.price_cents for price in store_prices], currency
+        )
 
         store_prices = [
             {
                 "store": price.store_name,
                 "store_slug": price.store_slug,
-                "price": self._convert(price.price_cents, currency),
+                "price": converted_price,
             }
-            for price in store_prices
+            for price, converted_price in zip(store_prices, converted_prices)
         ]
 
         serializer = self.get_response_serializer(store_prices, many=True)
@@ -146,32 +265,48 @@ class ProductViewSet(GenericViewSet):
     def price_history(self, request: Request, pk=None) -> Response:
         product = self.get_object()
         currency = self._get_currency(request)
-        history_prices = self._price_query.get_history(product.id)
+        filters = self._get_history_filters(request)
+        mode = request.query_params.get("mode")
+        resolution = request.query_params.get("resolution")
 
-        history = [
-            {
-                "store": price.store_name,
-                "store_slug": price.store_slug,
-                "price": self._convert(price.price_cents, currency),
-                "created_at": price.created_at,
-            }
-            for price in history_prices
-        ]
+        if resolution is not None:
+            return self._price_history_bucketed(
+                product.id, resolution, filters, currency
+            )
+
+        if mode == "page":
+            return self._price_history_page(request, product.id, filters, currency)
+
+        if mode == "stream":
+            history_prices = self._price_query.iter_history(
+                product.id, filters, self.HISTORY_STREAM_CHUNK_SIZE
+            )
+
+            return StreamingHttpResponse(
+                self._stream_history(history_prices, currency),
+                content_type="application/json",
+            )
 
-        by_date = defaultdict(list)
-        for price in history_prices:
-            day = price.created_at.date()
-            converted = self._convert(price.price_cents, currency)
+        if mode is not None:
+            raise ValidationError({"mode": "Expected one of: page, stream."})
 
-            if converted is not None:
-                by_date[day].append(converted)
+        history_prices = self._price_query.get_history(product.id, filters)
+        history = self._build_history(history_prices, currency)
+
+        daily_averages = self._price_query.get_daily_averages(product.id, filters)
+        converted_averages = self._convert_many(
+            [average.price_cents for average in daily_averages],
+            currency,
+            [average.date for average in daily_averages],
+        )
 
         average_history = [
             {
-                "price": sum(prices) / len(prices),
-                "date": day,
+                "price": converted_average,
+                "date": average.date,
             }
-            for day, prices in sorted(by_date.items())
+            for average, converted_average in zip(daily_averages, converted_averages)
+            if converted_average is not None
         ]
 
         serializer = self.get_response_serializer(
@@ -179,3 +314,96 @@ class ProductViewSet(GenericViewSet):
         )
 
         return Response(serializer.data)
+
+    def _price_history_bucketed(
+        self,
+        product_id: int,
+        resolution: str,
+        filters: PriceHistoryFilterDTO,
+        currency: str,
+    ) -> Response:
+        if resolution not in ResolutionChoices.values:
+            choices = ", ".join(ResolutionChoices.values)
+
+            raise ValidationError({"resolution": f"Expected one of: {choices}."})
+
+        buckets = self._price_query.get_history_bucketed(
+            product_id, ResolutionChoices(resolution), filters
+        )
+        converted_prices = iter(
+            self._convert_many(
+                [
+                    price
+                    for bucket in buckets
+                    for price in (
+                        bucket.open_price_cents,
+                        bucket.min_price_cents,
+                        bucket.max_price_cents,
+                        bucket.close_price_cents,
+                    )
+                ],
+                currency,
+                [bucket.bucket_start.date() for bucket in buckets for _ in range(4)],
+            )
+        )
+
+        history = [
+            {
+                "store": bucket.store_name,
+                "store_slug": bucket.store_slug,
+                "bucket_start": bucket.bucket_start,
+                "open": next(converted_prices),
+                "min": next(converted_prices),
+                "max": next(converted_prices),
+                "close": next(converted_prices),
+                "count": bucket.count,
+            }
+            for bucket in buckets
+        ]
+
+        serializer = PriceHistoryBucketSerializer(history, many=True)
+
+        return Response(serializer.data)
+
+    def _price_history_page(
+        self,
+        request: Request,
+        product_id: int,
+        filters: PriceHistoryFilterDTO,
+        currency: str,
+    ) -> Response:
+        try:
+            page = self._price_query.get_history_page(
+                product_id,
+                filters,
+                cursor=request.query_params.get("cursor"),
+                limit=self._get_page_size(request),
+            )
+        except InvalidCursorError:
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+        serializer = PriceHistoryPageSerializer(
+            {
+                "results": self._build_history(page.items, currency),
+                "next": page.next_cursor,
+            }
+        )
+
+        return Response(serializer.data)
+
+    def _stream_history(
+        self, history_prices: Iterable[StorePriceHistoryDTO], currency: str
+    ) -> Iterator[str]:
+        yield "["
+
+        separator = ""
+        for chunk in batched(history_prices, self.HISTORY_STREAM_CHUNK_SIZE):
+            serializer = PriceHistoryStoreSerializer(
+                self._build_history(chunk, currency), many=True
+            )
+            yield separator + ",".join(
+                json.dumps(item, cls=JSONEncoder) for item in serializer.data
+            )
+            separator = ","
+
+        yield "]"